@@ -0,0 +1,121 @@
+"""ubus 请求体编码 / 响应解码的微基准。
+
+对比旧实现（每次构造 dict，再用 aiohttp 默认的 json.dumps / json.loads）
+与预序列化模板 + 可选 orjson 的新实现，输出每次调用的字节数和耗时。
+
+用法: python benchmarks/bench_envelope.py [--number N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+from pathlib import Path
+import timeit
+
+_API_DIR = Path(__file__).resolve().parents[1] / "custom_components" / "youejia_custom" / "api"
+
+
+def _load_codec():
+    # 直接加载 codec.py，避免导入依赖 Home Assistant 的集成包
+    spec = importlib.util.spec_from_file_location("youejia_codec", _API_DIR / "codec.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+codec = _load_codec()
+
+TOKEN = "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 660
+SN_LIST = ["746011256365", "746011256372"]
+DEVICE = {
+    "E_FGP": ["0.00", "0.00", "0.00"], "E_on": False, "E_price": "0.00", "E_price_cur": 0,
+    "E_price_save": "0.00", "E_stats": 0, "STemp": 5, "bg_cfg": [0, 50, 2, 50, 0, 20, 1], "code": 0,
+    "cool_heat": 0, "crc_error": 0, "devtype": 2, "fan_speed": 0, "fg_open": False, "fgp_status": 0,
+    "h_s": 0, "hum_time_remain_hour": 0, "hum_time_remain_mins": 0, "hw_temp_set": 18,
+    "is_fan_work": False, "is_fg_valid": False, "is_heat": False, "is_key_lock": False,
+    "k_close": False, "key_P": 0, "key_V": 0, "mcu_type": 181, "mcu_version": 12, "mcu_version2": 198,
+    "mode": 0, "next_time": -1, "nickname": "智能温控器", "offline": False, "protectstatus": 0,
+    "rssi": -45, "sn": "746011256365", "subtype": 0, "sw": "18.0", "sys_lock": 1, "t_f_show": False,
+    "temp": "18.0", "tempJN": 3, "tempOUT": 0, "tempSS": 0, "temp_avg": 18, "temp_floor": "17.0",
+    "temp_max": 20, "temp_min": 15, "temp_status": 18, "type": 29, "version": 3, "xj_hours": 0,
+    "xj_temp_set": 5,
+}
+RESPONSE = json.dumps({"id": 3, "jsonrpc": "2.0", "result": [0, {"code": 0, "dev": [DEVICE] * len(SN_LIST)}]}).encode()
+
+
+def before_dev_info(request_id: int) -> bytes:
+    body = {
+        "id": request_id,
+        "jsonrpc": "2.0",
+        "method": "call",
+        "params": [TOKEN, "user_mgr", "user_dev_info", {
+            "dev_sn": list(SN_LIST),
+            "flavor": "UeHome",
+            "lang": 1,
+            "platform": 1,
+            "version": 1,
+        }],
+    }
+    return json.dumps(body).encode()
+
+
+def before_set(request_id: int) -> bytes:
+    body = {
+        "id": request_id,
+        "jsonrpc": "2.0",
+        "method": "call",
+        "params": [TOKEN, SN_LIST[0], "set", {
+            "flavor": "UeHome",
+            "hw_temp_set": 20,
+            "lang": 1,
+            "p_w": "778737911",
+            "platform": 1,
+            "version": 1,
+        }],
+    }
+    return json.dumps(body).encode()
+
+
+ENCODER = codec.EnvelopeEncoder(TOKEN)
+DEV_INFO_HEAD, DEV_INFO_TAIL = codec.encode_params_template("user_mgr", "user_dev_info", "dev_sn")
+
+
+def after_dev_info(request_id: int) -> bytes:
+    return ENCODER.encode(request_id, DEV_INFO_HEAD + codec.dumps(SN_LIST) + DEV_INFO_TAIL)
+
+
+def after_set(request_id: int) -> bytes:
+    return ENCODER.encode(request_id, codec.encode_params(SN_LIST[0], "set", {"hw_temp_set": 20, "p_w": "778737911"}))
+
+
+def _bench(func, number: int) -> float:
+    return min(timeit.repeat(lambda: func(7), number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    backend = "orjson" if codec.orjson is not None else "json"
+    print(f"JSON 后端: {backend}")
+    print(f"{'场景':<24}{'字节':>8}{'µs/次':>10}")
+    for name, func in (
+        ("user_dev_info 旧", before_dev_info),
+        ("user_dev_info 新", after_dev_info),
+        ("set 旧", before_set),
+        ("set 新", after_set),
+    ):
+        assert json.loads(func(7))["params"][0] == TOKEN
+        print(f"{name:<24}{len(func(7)):>8}{_bench(func, args.number):>10.2f}")
+
+    decode_before = min(timeit.repeat(lambda: json.loads(RESPONSE.decode()), number=args.number, repeat=5))
+    decode_after = min(timeit.repeat(lambda: codec.loads(RESPONSE), number=args.number, repeat=5))
+    print(f"{'响应解码 旧':<24}{len(RESPONSE):>8}{decode_before / args.number * 1e6:>10.2f}")
+    print(f"{'响应解码 新':<24}{len(RESPONSE):>8}{decode_after / args.number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""基于 api/doc 示例构造的本地 /ubus 假服务器。
+
+可以模拟任意数量的设备、网络延迟与抖动、错误码以及超时，
+供基准测试在不访问真实云端的情况下驱动 YoueJiaApiClient。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+import yaml
+
+DOC_DIR = Path(__file__).resolve().parents[1] / "custom_components" / "youejia_custom" / "api" / "doc"
+
+
+def _load_example(name: str) -> dict[str, Any]:
+    spec = yaml.safe_load((DOC_DIR / name).read_text(encoding="utf-8"))
+    content = spec["paths"]["/ubus"]["post"]["responses"]["200"]["content"]
+    return next(iter(content.values()))["example"]
+
+
+def device_template() -> dict[str, Any]:
+    """user_dev_info 示例响应中的第一个设备。"""
+    return _load_example("设备信息获取.yaml")["result"][1]["dev"][0]
+
+
+@dataclass
+class FakeUbusConfig:
+    """假服务器的行为参数。"""
+
+    devices: int = 10
+    latency: float = 0.02  # 秒
+    jitter: float = 0.005  # 秒，延迟在 ±jitter 内均匀分布
+    error_rate: float = 0.0  # 返回非零错误码的比例
+    error_code: int = 9
+    timeout_rate: float = 0.0  # 不响应（挂起 hang 秒）的比例
+    hang: float = 60.0
+    batch: bool = True  # 是否支持 JSON-RPC 批量请求
+    status: int = 200  # 非 200 时所有请求都返回该状态码，模拟接入点故障
+
+
+@dataclass
+class FakeUbus:
+    """本地 /ubus 服务器，记录收到的请求数。"""
+
+    config: FakeUbusConfig = field(default_factory=FakeUbusConfig)
+    requests: int = 0
+    probes: int = 0
+    calls: dict[str, int] = field(default_factory=dict)
+    base_url: str | None = None  # start() 之后可用
+    # 每台设备被 user_dev_info 查询的次数
+    device_reads: dict[str, int] = field(default_factory=dict)
+    # 每个 HTTP 请求一条：(time.monotonic(), 是否为批量请求, 包含的调用数)
+    request_log: list[tuple[float, bool, int]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        template = device_template()
+        self.devices: dict[str, dict[str, Any]] = {}
+        for index in range(self.config.devices):
+            device = copy.deepcopy(template)
+            device["sn"] = f"7460{index:08d}"
+            device["nickname"] = f"温控器 {index}"
+            self.devices[device["sn"]] = device
+        self.passwd = "778737911"
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def serial_numbers(self) -> list[str]:
+        return list(self.devices)
+
+    def include_devices(self) -> list[dict[str, Any]]:
+        """与 config entry 的 include_devices 选项格式一致的设备列表。"""
+        return [
+            {"sn": sn, "nickname": dev["nickname"], "passwd": self.passwd, "type": 29, "offline": False}
+            for sn, dev in self.devices.items()
+        ]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """启动服务器，返回 base_url。"""
+        app = web.Application()
+        app.router.add_post("/ubus", self._handle)
+        app.router.add_route("HEAD", "/ubus", self._handle_probe)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets  # noqa: SLF001
+        self.base_url = f"http://{host}:{sockets[0].getsockname()[1]}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _delay(self) -> float:
+        delay = self.config.latency + random.uniform(-self.config.jitter, self.config.jitter)
+        if random.random() < self.config.timeout_rate:
+            delay = self.config.hang
+        return max(0.0, delay)
+
+    async def _handle_probe(self, request: web.Request) -> web.StreamResponse:
+        """客户端探测接入点延迟的 HEAD 请求，与真实服务器一样不允许该方法。"""
+        self.probes += 1
+        await asyncio.sleep(self._delay())
+        return web.Response(status=self.config.status if self.config.status != 200 else 405)
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = json.loads(await request.read())
+        batch = isinstance(body, list)
+        self.request_log.append((time.monotonic(), batch, len(body) if batch else 1))
+
+        await asyncio.sleep(self._delay())
+        if self.config.status != 200:
+            return web.Response(status=self.config.status, text="unavailable")
+
+        if isinstance(body, list):
+            if not self.config.batch:
+                return web.json_response({"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}})
+            return web.json_response([self._call(item) for item in body])
+        return web.json_response(self._call(body))
+
+    def _call(self, body: dict[str, Any]) -> dict[str, Any]:
+        _token, obj, method, payload = body["params"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if random.random() < self.config.error_rate:
+            return {"id": body["id"], "jsonrpc": "2.0", "result": [self.config.error_code]}
+
+        if method == "user_get_info":
+            result = {
+                "code": 0,
+                "dev_all": len(self.devices),
+                "devices": [
+                    {**dev, "is_authfrom": False, "is_authto": False}
+                    for dev in self.include_devices()
+                ],
+            }
+        elif method == "user_dev_info":
+            for sn in payload["dev_sn"]:
+                self.device_reads[sn] = self.device_reads.get(sn, 0) + 1
+            result = {"code": 0, "dev": [self.devices[sn] for sn in payload["dev_sn"] if sn in self.devices]}
+        elif method == "set":
+            device = self.devices.get(obj)
+            if device is None:
+                return {"id": body["id"], "jsonrpc": "2.0", "result": [4]}
+            for key in ("k_close", "hw_temp_set", "mode"):
+                if key in payload:
+                    device[key] = payload[key]
+            if "hw_temp_set" in payload:
+                device["temp_status"] = payload["hw_temp_set"]
+            # set 的响应不带 sn/nickname/offline 等字段
+            result = {
+                key: value for key, value in device.items()
+                if key not in ("sn", "nickname", "offline", "type", "subtype")
+            }
+        else:
+            return {"id": body["id"], "jsonrpc": "2.0", "result": [3]}
+
+        return {"id": body["id"], "jsonrpc": "2.0", "result": [0, result]}
@@ -0,0 +1,301 @@
+"""youejia 离线基准测试。
+
+针对本地假 /ubus 服务器（fake_ubus.py），在不同设备数下测量：
+轮询延迟、命令到状态可见的延迟、批量设置的延迟、请求数以及每台设备的内存占用，
+并输出机器可读的 JSON 报告，便于在版本之间比较性能回归。
+请求数均由假服务器的请求日志统计；--no-batch 时批量设置退回为逐个请求。
+
+协调器相关的指标需要安装 Home Assistant；否则只测量 API 客户端。
+
+用法:
+    python benchmarks/run_benchmarks.py --devices 1,10,100,1000 --output bench_report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+from fake_ubus import FakeUbus, FakeUbusConfig
+
+ROOT = Path(__file__).resolve().parents[1]
+API_DIR = ROOT / "custom_components" / "youejia_custom" / "api"
+
+
+def _load_api():
+    """不经过集成包（依赖 Home Assistant）直接加载 api 子包。"""
+    spec = importlib.util.spec_from_file_location(
+        "youejia_api", API_DIR / "__init__.py", submodule_search_locations=[str(API_DIR)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["youejia_api"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _summary(samples: list[float]) -> dict[str, float | None]:
+    if not samples:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _requests_since(fake: FakeUbus, mark: int) -> dict[str, int]:
+    """假服务器请求日志中第 mark 条之后的 HTTP 请求数及其中包含的调用数。"""
+    log = fake.request_log[mark:]
+    return {
+        "requests": len(log),
+        "batch_requests": sum(1 for _time, batch, _calls in log if batch),
+        "calls": sum(calls for *_, calls in log),
+    }
+
+
+def _memory_per_device(api, fake: FakeUbus) -> dict[str, float]:
+    """解析后的快照（sn -> DeviceState）与原始字典各自每台设备的内存。"""
+    payloads = [json.loads(json.dumps(dev)) for dev in fake.devices.values()]
+    count = max(1, len(payloads))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    states = {dev["sn"]: api.DeviceState.from_payload(dev) for dev in payloads}
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    parsed = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    raw = {dev["sn"]: json.loads(json.dumps(dev)) for dev in payloads}
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    raw_size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    del states, raw
+    return {"device_state_bytes": round(parsed / count, 1), "raw_dict_bytes": round(raw_size / count, 1)}
+
+
+async def bench_api(api, fake: FakeUbus, base_url: str, args: argparse.Namespace) -> dict[str, Any]:
+    client = api.YoueJiaApiClient("bench-token", "bench-user", base_url=base_url,
+                                  rate_limit=args.rate_limit, rate_burst=args.rate_burst)
+    try:
+        sns = fake.serial_numbers
+        poll_samples = []
+        mark = len(fake.request_log)
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            _devices, failed = await client.async_get_devices_sharded(
+                sns, shard_size=args.shard_size, max_concurrency=args.max_concurrency)
+            poll_samples.append(time.perf_counter() - start)
+        requests_per_poll = _requests_since(fake, mark)["requests"] / args.repeat
+
+        set_samples = []
+        set_errors = 0
+        for index in range(args.repeat):
+            start = time.perf_counter()
+            try:
+                await client.async_set_temperature(sns[index % len(sns)], fake.passwd, temperature=15 + index % 10)
+            except api.YoueJiaApiError:
+                set_errors += 1
+                continue
+            set_samples.append(time.perf_counter() - start)
+
+        # 一次把多台设备的 set 打包成 JSON-RPC 批量请求（服务端不支持时自动退回为单个请求）
+        batch_sns = sns[:args.batch_size]
+        batch_samples = []
+        batch_errors = 0
+        mark = len(fake.request_log)
+        for index in range(args.repeat):
+            calls = [
+                client.set_call(sn, fake.passwd, {"hw_temp_set": 15 + index % 10}) for sn in batch_sns
+            ]
+            start = time.perf_counter()
+            results = await client.async_call_batch(calls)
+            batch_samples.append(time.perf_counter() - start)
+            batch_errors += sum(1 for result in results if isinstance(result, api.YoueJiaApiError))
+        batch_requests = _requests_since(fake, mark)
+
+        return {
+            "poll": _summary(poll_samples),
+            "set": _summary(set_samples),
+            "set_errors": set_errors,
+            "batch_set": {
+                "devices": len(batch_sns),
+                **_summary(batch_samples),
+                "errors": batch_errors,
+                "requests_per_batch": batch_requests["requests"] / args.repeat,
+                "batch_requests": batch_requests["batch_requests"],
+            },
+            "requests_per_poll": requests_per_poll,
+            "failed_devices_last_poll": len(failed),
+            "metrics": client.metrics.as_dict(),
+        }
+    finally:
+        await client.async_close()
+
+
+async def bench_coordinator(fake: FakeUbus, base_url: str, args: argparse.Namespace) -> dict[str, Any] | None:
+    try:
+        from homeassistant.core import HomeAssistant
+        from homeassistant.exceptions import HomeAssistantError
+        from homeassistant.helpers import device_registry as dr, entity_registry as er
+    except ImportError:
+        return None
+
+    sys.path.insert(0, str(ROOT))
+    from custom_components.youejia_custom.api import YoueJiaApiClient
+    from custom_components.youejia_custom.const import CONF_MAX_CONCURRENCY, CONF_SHARD_SIZE
+    from custom_components.youejia_custom.coordinator import YouEJiaCoordinator
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        # 协调器按实体注册表筛选需要轮询的设备
+        await dr.async_load(hass)
+        await er.async_load(hass)
+        client = YoueJiaApiClient("bench-token", "bench-user", base_url=base_url,
+                                  rate_limit=args.rate_limit, rate_burst=args.rate_burst)
+        coordinator = YouEJiaCoordinator(hass, client)
+        # 只需要 entry_id 和 options 的最小 config entry
+        coordinator.async_add_entry(SimpleNamespace(entry_id="bench", options={
+            "include_devices": fake.include_devices(),
+            CONF_SHARD_SIZE: args.shard_size,
+            CONF_MAX_CONCURRENCY: args.max_concurrency,
+        }))
+        try:
+            poll_samples = []
+            mark = len(fake.request_log)
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                poll_samples.append(time.perf_counter() - start)
+            requests_per_poll = _requests_since(fake, mark)["requests"] / args.repeat
+            # 按协调器此时实际采用的轮询间隔折算
+            interval = coordinator.update_interval.total_seconds() if coordinator.update_interval else None
+            poll_reason = coordinator.poll_reason
+
+            # 命令发出到新状态对监听者可见的延迟
+            command_samples = []
+            command_errors = 0
+            mark = len(fake.request_log)
+            sn = fake.serial_numbers[0]
+            for index in range(args.repeat):
+                target = 15 + index % 10
+                seen = asyncio.Event()
+
+                def _listener(target: float = target) -> None:
+                    if coordinator.data[sn].temp_status == target:
+                        seen.set()
+
+                remove = coordinator.async_add_listener(_listener)
+                start = time.perf_counter()
+                try:
+                    await coordinator.async_send_command(sn, fake.passwd, {"hw_temp_set": target})
+                    await seen.wait()
+                except HomeAssistantError:
+                    command_errors += 1
+                else:
+                    command_samples.append(time.perf_counter() - start)
+                finally:
+                    remove()
+
+            return {
+                "poll": _summary(poll_samples),
+                "command_to_state": _summary(command_samples),
+                "command_errors": command_errors,
+                "requests_per_command": _requests_since(fake, mark)["requests"] / args.repeat,
+                "requests_per_poll": requests_per_poll,
+                "poll_interval": {"seconds": interval, "reason": poll_reason},
+                "requests_per_minute": round(requests_per_poll * 60 / interval, 2) if interval else None,
+                "skipped_writes": coordinator.skipped_writes,
+            }
+        finally:
+            await coordinator.async_shutdown()
+            await client.async_close()
+            await hass.async_stop(force=True)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api = _load_api()
+    results = []
+    for count in args.devices:
+        fake = FakeUbus(FakeUbusConfig(
+            devices=count,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            timeout_rate=args.timeout_rate,
+            batch=not args.no_batch,
+        ))
+        base_url = await fake.start()
+        try:
+            result = {
+                "devices": count,
+                "api": await bench_api(api, fake, base_url, args),
+                "coordinator": await bench_coordinator(fake, base_url, args),
+                "memory_per_device": _memory_per_device(api, fake),
+                "server_calls": dict(fake.calls),
+            }
+        finally:
+            await fake.stop()
+        results.append(result)
+        print(
+            f"devices={count:>5} poll p50={result['api']['poll']['p50_ms']}ms "
+            f"set p50={result['api']['set']['p50_ms']}ms "
+            f"mem={result['memory_per_device']['device_state_bytes']}B/dev",
+            file=sys.stderr,
+        )
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="youejia 离线基准测试")
+    parser.add_argument("--devices", type=lambda value: [int(item) for item in value.split(",")],
+                        default=[1, 10, 100, 1000], help="逗号分隔的设备数，如 1,10,100,1000")
+    parser.add_argument("--repeat", type=int, default=20, help="每项测量的重复次数")
+    parser.add_argument("--latency", type=float, default=0.02, help="服务器延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.005, help="延迟抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回错误码的比例")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="请求挂起不响应的比例")
+    parser.add_argument("--no-batch", action="store_true", help="模拟不支持批量请求的服务器")
+    parser.add_argument("--batch-size", type=int, default=10, help="批量设置包含的设备数")
+    parser.add_argument("--shard-size", type=int, default=20)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    # 默认几乎不限流，测量的是客户端本身的开销
+    parser.add_argument("--rate-limit", type=float, default=10000.0, help="客户端限流（每秒请求数）")
+    parser.add_argument("--rate-burst", type=int, default=10000, help="客户端限流允许的突发数")
+    parser.add_argument("--output", type=Path, help="报告输出路径，默认输出到标准输出")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
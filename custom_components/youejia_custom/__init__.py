@@ -2,32 +2,145 @@
 
 from __future__ import annotations
 
-from .coordinator import YouEJiaCoordinator
+from .coordinator import YouEJiaCoordinator, snapshot_store
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform, CONF_TOKEN
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
 
 from .api import YoueJiaApiClient
+from .const import DATA_HUBS, DATA_KEY_SN, DOMAIN, SIGNAL_DEVICES_UPDATED
+from .services import async_setup_services
+from .session import async_get_shared_session
 
-_PLATFORMS: list[Platform] = [Platform.CLIMATE]
+_PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.CLIMATE, Platform.SENSOR]
 
 type YouEJiaConfigEntry = ConfigEntry[YouEJiaCoordinator]  # noqa: F821
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """设置 youejia 的服务。"""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: YouEJiaConfigEntry) -> bool:
     """从 config entry 设置 youejia。"""
 
-    api_data = entry.data.get('api_data')
-    api_client = YoueJiaApiClient(api_data[CONF_TOKEN], api_data['user_id'])
-    cd = YouEJiaCoordinator(hass, api_client, entry)
-    await cd.async_config_entry_first_refresh()
+    cd = _async_acquire_hub(hass, entry)
+    if cd.data is None:
+        await cd.async_load_snapshot()
+
+    # 共享的协调器可能已经有数据（或持久化的快照），只有出现需要轮询的新设备时才阻塞等待刷新
+    if cd.data is None or any(sn not in cd.data for sn in _entry_request_sns(cd, entry)):
+        await cd.async_refresh()
+        if not cd.last_update_success:
+            await _async_release_hub(hass, entry)
+            if cd.auth_failed:
+                raise ConfigEntryAuthFailed(f"token 无效或已过期: {cd.last_exception}")
+            raise ConfigEntryNotReady(f"无法获取设备数据: {cd.last_exception}")
+    elif cd.stale:
+        # 先用快照创建实体，首次实时轮询放到后台
+        entry.async_create_background_task(hass, cd.async_refresh(), f"{DOMAIN} first refresh")
 
     entry.runtime_data = cd
     await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     return True
 
 
+async def _async_options_updated(hass: HomeAssistant, entry: YouEJiaConfigEntry) -> None:
+    """选项变化后增量增删设备，不重新加载 entry，也不重建协调器。
+
+    轮询间隔等其他选项由协调器在每次轮询时读取，无需处理。
+    """
+    cd = entry.runtime_data
+    cd.async_invalidate_serial_numbers()
+    entry_sns = {dev[DATA_KEY_SN] for dev in entry.options.get('include_devices') or [] if dev}
+
+    # 设备解除与本 entry 的关联后，实体注册表会删除本 entry 在该设备上的实体
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not any(domain == DOMAIN and sn in entry_sns for domain, sn in device.identifiers):
+            device_registry.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+
+    # 各平台只为新增的设备创建实体
+    async_dispatcher_send(hass, SIGNAL_DEVICES_UPDATED.format(entry.entry_id))
+    if cd.data is None or any(sn not in cd.data for sn in _entry_request_sns(cd, entry)):
+        await cd.async_request_refresh()
+
+
+def _entry_request_sns(cd: YouEJiaCoordinator, entry: ConfigEntry) -> list[str]:
+    """entry 选中的设备中需要轮询的（实体未全部禁用）。"""
+    entry_sns = {dev[DATA_KEY_SN] for dev in entry.options.get('include_devices') or [] if dev}
+    return [sn for sn in cd.request_serial_numbers if sn in entry_sns]
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: YouEJiaConfigEntry) -> bool:
     """卸载 config entry。"""
-    return await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, _PLATFORMS):
+        await _async_release_hub(hass, entry)
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: YouEJiaConfigEntry) -> None:
+    """删除 config entry 时，若账号下已没有其他 entry，则一并删除设备快照。
+
+    删除的 entry 持有账号级诊断传感器时，重新加载接手的 entry 以创建这些传感器。
+    """
+    user_id = entry.data['api_data']['user_id']
+    owner = account_sensors_owner(hass, user_id, exclude=entry.entry_id)
+    if owner is None:
+        await snapshot_store(hass, user_id).async_remove()
+    elif entry.entry_id < owner:
+        hass.config_entries.async_schedule_reload(owner)
+
+
+def account_sensors_owner(hass: HomeAssistant, user_id: str, *, exclude: str | None = None) -> str | None:
+    """负责创建账号级诊断传感器的 entry。
+
+    同一账号的 entry 共用一个协调器，诊断传感器只由其中 entry_id 最小的一个创建。
+    """
+    return min(
+        (
+            other.entry_id for other in hass.config_entries.async_entries(DOMAIN)
+            if other.entry_id != exclude and other.data['api_data']['user_id'] == user_id
+        ),
+        default=None,
+    )
+
+
+def _async_acquire_hub(hass: HomeAssistant, entry: ConfigEntry) -> YouEJiaCoordinator:
+    """获取（必要时创建）entry 所属账号的共享协调器，并登记该 entry。"""
+    api_data = entry.data.get('api_data')
+    hubs: dict[str, YouEJiaCoordinator] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_HUBS, {})
+
+    if (cd := hubs.get(api_data['user_id'])) is None:
+        shared = async_get_shared_session(hass)
+        api_client = YoueJiaApiClient(api_data[CONF_TOKEN], api_data['user_id'],
+                                      session=shared.session, connection_stats=shared.connections,
+                                      traced_session=shared.traced_session)
+        cd = hubs[api_data['user_id']] = YouEJiaCoordinator(hass, api_client)
+    elif cd.api.token != api_data[CONF_TOKEN]:
+        # 重新认证后 entry 重新加载，账号下其他 entry 仍在使用同一个协调器
+        cd.async_update_token(api_data[CONF_TOKEN])
+
+    cd.async_add_entry(entry)
+    return cd
+
+
+async def _async_release_hub(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """注销 entry；账号下最后一个 entry 卸载时关闭协调器和客户端。"""
+    user_id = entry.data['api_data']['user_id']
+    hubs: dict[str, YouEJiaCoordinator] = hass.data[DOMAIN][DATA_HUBS]
+    cd = hubs[user_id]
+    if cd.async_remove_entry(entry):
+        del hubs[user_id]
+        await cd.async_shutdown()
+        await cd.api.async_close()
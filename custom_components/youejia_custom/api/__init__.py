@@ -4,34 +4,99 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from collections.abc import Iterable
-from enum import IntEnum
+import time
+from collections.abc import Callable, Iterable, Sequence
 from typing import Any
 
 import aiohttp
 
+from .commands import CommandQueue
+from .endpoints import EndpointPool
+from .codec import EnvelopeEncoder, UbusCall, dumps, encode_params, encode_params_template, loads
+from .exceptions import (
+    YoueJiaApiError,
+    YoueJiaAuthError,
+    YoueJiaCircuitOpenError,
+    YoueJiaDeviceError,
+    YoueJiaHttpError,
+    YoueJiaResultError,
+    YoueJiaTimeoutError,
+)
+from .metrics import (
+    OUTCOME_ERROR,
+    OUTCOME_HTTP_ERROR,
+    OUTCOME_RESULT_ERROR,
+    OUTCOME_SUCCESS,
+    OUTCOME_TIMEOUT,
+    ApiMetrics,
+    ConnectionStats,
+)
+from .models import SET_SCHEMA, DeviceState, YoueJiaMode, validate_set_fields
+from .ratelimit import Priority, PriorityRateLimiter
+from .resilience import CircuitBreaker, RollingLatency, backoff_delay
+from .token import token_expiry
+from .tracing import CallTrace, Tracer, http_trace_config
+
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "https://cn.zncn.net.cn"
 _UBUS_PATH = "/ubus"
 _DEFAULT_ID = 1
-_DEFAULT_JSONRPC = "2.0"
-_DEFAULT_METHOD = "call"
-_DEFAULT_FLAVOR = "UeHome"
-_DEFAULT_LANG = 1
-_DEFAULT_PLATFORM = 1
-_DEFAULT_VERSION = 1
-
-
-class YoueJiaApiError(Exception):
-    """youejia 接口调用异常。"""
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
+# 分阶段超时：建立连接、读取响应分别限时，总时长兜底
+_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10, sock_read=15)
+# 连接池：keep-alive 需要覆盖常规轮询间隔，才能在两次轮询之间复用 TCP/TLS 连接
+_LIMIT_PER_HOST = 10
+_KEEPALIVE_TIMEOUT = 90  # 秒
+_DNS_CACHE_TTL = 300  # 秒
+_SESSION_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+# 接入点探测：只测量往返延迟，不经过限流器
+_PROBE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+# 只读、可安全重试和对冲的方法
+_IDEMPOTENT_METHODS = frozenset({"user_dev_info", "user_get_info"})
+_MAX_RETRIES = 2
+_RETRY_BASE_DELAY = 0.5  # 秒
+_RETRY_MAX_DELAY = 5.0  # 秒
+# ubus 的 UBUS_STATUS_PERMISSION_DENIED，以及 rpcd 会话失效时的 JSON-RPC 错误码
+_AUTH_ERROR_CODES = frozenset({6})
+_RPC_ACCESS_DENIED = -32002
+_MIN_HEDGE_DELAY = 0.2  # 秒，避免 p95 过小时频繁对冲
+# 账号级限流：平均每秒请求数及允许的突发数
+_RATE_LIMIT = 2.0
+_RATE_BURST = 10
+# 各方法的限流优先级，未列出的按轮询处理
+_METHOD_PRIORITY = {
+    "set": Priority.COMMAND,
+    "user_dev_info": Priority.POLL,
+    "user_get_info": Priority.DISCOVERY,
+}
 
-class YoueJiaMode(IntEnum):
-    """工作模式枚举。"""
-
-    CONSTANT = 0  # 恒温模式
-    SMART = 1  # 智能模式
-    VACATION = 2  # 休假模式
+__all__ = [
+    "DEFAULT_BASE_URL",
+    "SET_SCHEMA",
+    "CallTrace",
+    "ApiMetrics",
+    "CommandQueue",
+    "ConnectionStats",
+    "DeviceState",
+    "EndpointPool",
+    "Priority",
+    "Tracer",
+    "UbusCall",
+    "YoueJiaApiClient",
+    "YoueJiaApiError",
+    "YoueJiaAuthError",
+    "YoueJiaCircuitOpenError",
+    "YoueJiaDeviceError",
+    "YoueJiaHttpError",
+    "YoueJiaMode",
+    "YoueJiaResultError",
+    "YoueJiaTimeoutError",
+    "create_session",
+    "http_trace_config",
+    "validate_set_fields",
+]
 
 
 class YoueJiaApiClient:
@@ -43,157 +108,496 @@ class YoueJiaApiClient:
             user_id: str,
             *,
             session: aiohttp.ClientSession | None = None,
-            base_url: str = "https://cn.zncn.net.cn",
+            base_url: str = DEFAULT_BASE_URL,
+            endpoints: Sequence[str] | None = None,
+            rate_limit: float = _RATE_LIMIT,
+            rate_burst: int = _RATE_BURST,
+            connection_stats: ConnectionStats | None = None,
+            traced_session: Callable[[], aiohttp.ClientSession] | None = None,
     ) -> None:
-        """初始化客户端，暴露 token、user_id。"""
-        self.token = token
+        """初始化客户端，暴露 token、user_id。
+
+        传入 session 时（例如集成共享的会话）由调用方负责关闭，并可传入该会话的连接复用统计，
+        以及开启追踪时获取带 http_trace_config 的会话的 traced_session。
+        传入 endpoints 时在这些候选接入点之间选择和切换，否则只使用 base_url。
+        """
         self.user_id = user_id
         self._session: aiohttp.ClientSession | None = session
-        self._base_url = base_url.rstrip("/")
+        self.endpoints = EndpointPool(endpoints or [base_url])
         self._session_owner = session is None
+        self._traced_session = traced_session
+        self.connections = connection_stats if session is not None else ConnectionStats()
         self._request_id = _DEFAULT_ID
+        # 服务端是否支持 JSON-RPC 批量请求，None 表示尚未探测
+        self._batch_supported: bool | None = None
+        self.metrics = ApiMetrics()
+        self.breaker = CircuitBreaker()
+        self._read_latency = RollingLatency()
+        # 同一账号只有一个客户端，所有请求（含重试、对冲）共享一个限流器
+        self.limiter = PriorityRateLimiter(rate_limit, rate_burst)
+        # 追踪默认关闭；关闭时请求路径上只有 `is None` 判断
+        self.tracer: Tracer | None = None
+
+        # 预序列化的请求模板，只有 id、序列号列表和变化的字段需要逐次拼接
+        self.update_token(token)
+        self._user_info_call = UbusCall(
+            "user_get_info", encode_params("db_agent2", "user_get_info", {"user_id": user_id}))
+        self._dev_info_head, self._dev_info_tail = encode_params_template("user_mgr", "user_dev_info", "dev_sn")
+
+    def update_token(self, token: str) -> None:
+        """更换 token（重新认证后），并重新解析其过期时间。"""
+        self.token = token
+        # JWT 的 exp（Unix 时间戳），无法解析时为 None
+        self.token_expires_at = token_expiry(token)
+        self._encoder = EnvelopeEncoder(token)
+
+    @property
+    def token_expired(self) -> bool:
+        return self.token_expires_at is not None and time.time() >= self.token_expires_at
+
+    async def async_set_tracing(self, capacity: int | None) -> None:
+        """开启（保留最慢的 capacity 次调用）或关闭（None）请求追踪。"""
+        if capacity == (self.tracer.capacity if self.tracer is not None else None):
+            return
+        self.tracer = Tracer(capacity) if capacity is not None else None
+        # TraceConfig 只能在创建会话时挂上，自己创建的会话需要重建；外部会话改用 traced_session
+        if self._session_owner and self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def async_close(self) -> None:
         """关闭内部创建的会话。"""
         if self._session_owner and self._session and not self._session.closed:
             await self._session.close()
 
+    def device_info_call(self, serial_numbers: Iterable[str]) -> UbusCall:
+        """构造批量获取设备信息（user_dev_info）的调用。"""
+        sn_list = list(serial_numbers)
+        if not sn_list:
+            raise YoueJiaApiError("设备序列号列表为空")
+
+        return UbusCall("user_dev_info", self._dev_info_head + dumps(sn_list) + self._dev_info_tail)
+
+    @staticmethod
+    def set_call(serial_number: str, password: str, fields: dict[str, Any]) -> UbusCall:
+        """构造设置设备状态（set）的调用，payload 中只拼接变化的字段。"""
+        return UbusCall("set", encode_params(serial_number, "set", {**fields, "p_w": password}))
+
+    async def async_call(self, call: UbusCall) -> dict[str, Any]:
+        """执行单个调用。
+
+        只读调用在超时、网络异常或 5xx 时有限次重试，并在耗时超过最近 p95 时发出对冲请求；
+        连续失败会触发熔断，熔断期间直接抛出 YoueJiaCircuitOpenError。
+        """
+        idempotent = call.method in _IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self._before_call()
+            try:
+                if idempotent:
+                    result = await self._async_hedged(call)
+                else:
+                    result = await self._async_post_ubus(call)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except YoueJiaApiError as err:
+                if not _is_transient(err):
+                    # 服务端正常响应了（例如错误码），不计入熔断
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if not idempotent or attempt >= _MAX_RETRIES:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+
+            self.metrics.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, _RETRY_BASE_DELAY, _RETRY_MAX_DELAY))
+            attempt += 1
+
+    def _before_call(self) -> None:
+        if self.token_expired:
+            # 已过期的 token 发出去也只会得到权限错误
+            raise YoueJiaAuthError(message="token 已过期")
+        try:
+            self.breaker.before_call()
+        except YoueJiaCircuitOpenError:
+            self.metrics.rejected += 1
+            raise
+
+    async def _async_hedged(self, call: UbusCall) -> dict[str, Any]:
+        """请求耗时超过最近的 p95 时，再发一个相同请求，取先成功的结果。"""
+        p95 = self._read_latency.percentile(0.95)
+        if p95 is None:
+            return await self._async_post_ubus(call)
+
+        tasks = [asyncio.ensure_future(self._async_post_ubus(call))]
+        try:
+            done, _pending = await asyncio.wait(tasks, timeout=max(p95, _MIN_HEDGE_DELAY))
+            # 限流排队时再发对冲请求只会加重拥塞
+            if not done and self.limiter.idle:
+                self.metrics.hedged_requests += 1
+                tasks.append(asyncio.ensure_future(self._async_post_ubus(call)))
+
+            error: BaseException | None = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if (error := task.exception()) is None:
+                        return task.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def async_call_batch(self, calls: Sequence[UbusCall]) -> list[dict[str, Any] | YoueJiaApiError]:
+        """把多个调用打包成一个 JSON-RPC 2.0 批量请求，并按 id 匹配响应。
+
+        返回值与 calls 一一对应，单个调用失败时对应位置为异常对象。
+        服务端不支持批量请求时，自动退回为并发的单个请求。
+        """
+        if len(calls) > 1 and self._batch_supported is not False:
+            self._before_call()
+            try:
+                return await self._async_post_batch(calls)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except _BatchUnsupported as err:
+                self.breaker.record_success()
+                _LOGGER.info("服务端不支持批量请求，改为并发发送单个请求: %s", err)
+                self._batch_supported = False
+
+        results = await asyncio.gather(*(self.async_call(call) for call in calls), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, YoueJiaApiError):
+                raise result
+        return results
+
+    async def _async_post_batch(self, calls: Sequence[UbusCall]) -> list[dict[str, Any] | YoueJiaApiError]:
+        request_ids = []
+        parts = []
+        for call in calls:
+            self._request_id += 1
+            request_ids.append(self._request_id)
+            parts.append(self._encoder.encode(self._request_id, call.params))
+
+        body = b'[' + b','.join(parts) + b']'
+        await self._async_throttle(min(_priority(call) for call in calls))
+        start = time.monotonic()
+        received = 0
+        # 被取消的请求不计入统计
+        outcome: str | None = None
+        try:
+            data, received = await self._async_post(body, batch=True)
+            outcome = OUTCOME_SUCCESS
+        except YoueJiaApiError as err:
+            outcome = _outcome(err)
+            if isinstance(err, YoueJiaHttpError) and 400 <= err.status < 500:
+                raise _BatchUnsupported(str(err)) from err
+            # 超时、网络异常等与是否支持批量无关，所有调用都视为失败
+            self.breaker.record_failure()
+            return [err] * len(calls)
+        finally:
+            if outcome is not None:
+                self.metrics.record("batch", time.monotonic() - start, outcome,
+                                    bytes_sent=len(body), bytes_received=received)
+
+        if not isinstance(data, list):
+            raise _BatchUnsupported(f"批量请求返回的不是数组: {str(data)[:200]}")
+        self._batch_supported = True
+        self.breaker.record_success()
+
+        responses = {item.get("id"): item for item in data if isinstance(item, dict)}
+        results: list[dict[str, Any] | YoueJiaApiError] = []
+        for request_id in request_ids:
+            if (item := responses.get(request_id)) is None:
+                results.append(YoueJiaApiError(f"批量响应中缺少 id: {request_id}"))
+                continue
+            try:
+                results.append(self._extract_result(item))
+            except YoueJiaApiError as err:
+                results.append(err)
+        return results
+
     async def async_get_user_info(self) -> dict[str, Any]:
         """获取用户信息。"""
-        payload = {
-            "flavor": _DEFAULT_FLAVOR,
-            "lang": _DEFAULT_LANG,
-            "platform": _DEFAULT_PLATFORM,
-            "user_id": self.user_id,
-            "version": _DEFAULT_VERSION,
-        }
-        params: list[Any] = [self.token, "db_agent2", "user_get_info", payload]
-        result = await self._async_post_ubus(params)
+        result = await self.async_call(self._user_info_call)
         return result
 
     async def async_get_devices(self, serial_numbers: Iterable[str]) -> dict[str, Any]:
         """批量获取设备信息。"""
+        result = await self.async_call(self.device_info_call(serial_numbers))
+        return result
+
+    async def async_get_devices_sharded(
+            self,
+            serial_numbers: Iterable[str],
+            *,
+            shard_size: int,
+            max_concurrency: int,
+    ) -> tuple[list[DeviceState], dict[str, YoueJiaApiError]]:
+        """把序列号拆成多个分片并发查询，单个分片失败不影响其他分片。
+
+        熔断器未关闭时先单独查询第一个分片作为试探，再并发查询其余分片。
+        返回成功获取并解析的设备状态，以及失败分片中每个序列号对应的异常；
+        单台设备的数据无效时只跳过该设备，对应的异常为 YoueJiaDeviceError。
+        """
         sn_list = list(serial_numbers)
         if not sn_list:
             raise YoueJiaApiError("设备序列号列表为空")
 
-        payload = {
-            "dev_sn": sn_list,
-            "flavor": _DEFAULT_FLAVOR,
-            "lang": _DEFAULT_LANG,
-            "platform": _DEFAULT_PLATFORM,
-            "version": _DEFAULT_VERSION,
-        }
-        params: list[Any] = [self.token, "user_mgr", "user_dev_info", payload]
-        result = await self._async_post_ubus(params)
-        return result
+        shard_size = max(1, shard_size)
+        shards = [sn_list[i:i + shard_size] for i in range(0, len(sn_list), shard_size)]
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _fetch(shard: Sequence[str]) -> tuple[list[DeviceState], dict[str, YoueJiaApiError]]:
+            async with semaphore:
+                result = await self.async_get_devices(shard)
+            return _parse_devices(result.get('dev') or [])
+
+        results: list[Any] = []
+        if self.breaker.state != CircuitBreaker.CLOSED and len(shards) > 1:
+            # 半开状态只放行一个试探请求：并发查询时其余分片会被直接拒绝，
+            # 先单独查询第一个分片，恢复后再并发查询其余分片
+            results += await asyncio.gather(_fetch(shards[0]), return_exceptions=True)
+        results += await asyncio.gather(*(_fetch(shard) for shard in shards[len(results):]), return_exceptions=True)
+
+        devices: list[DeviceState] = []
+        failed: dict[str, YoueJiaApiError] = {}
+        for shard, result in zip(shards, results):
+            if isinstance(result, YoueJiaApiError):
+                _LOGGER.debug("分片查询失败, sn: %s, err: %s", shard, result)
+                failed.update(dict.fromkeys(shard, result))
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                devices.extend(result[0])
+                failed.update(result[1])
+        return devices, failed
 
     async def async_set_power(
             self, serial_number: str, password: str, *, power_on: bool
     ) -> dict[str, Any]:
         """设置设备开关机。"""
-        payload = {
-            "flavor": _DEFAULT_FLAVOR,
-            "k_close": not power_on,
-            "lang": _DEFAULT_LANG,
-            "p_w": password,
-            "platform": _DEFAULT_PLATFORM,
-            "version": _DEFAULT_VERSION,
-        }
-        params: list[Any] = [self.token, serial_number, "set", payload]
-        result = await self._async_post_ubus(params)
-        return result
+        return await self.async_set_state(serial_number, password, k_close=not power_on)
 
     async def async_set_temperature(
             self, serial_number: str, password: str, *, temperature: int
     ) -> dict[str, Any]:
         """设置设备目标温度。"""
-        payload = {
-            "flavor": _DEFAULT_FLAVOR,
-            "hw_temp_set": int(temperature),
-            "lang": _DEFAULT_LANG,
-            "p_w": password,
-            "platform": _DEFAULT_PLATFORM,
-            "version": _DEFAULT_VERSION,
-        }
-        params: list[Any] = [self.token, serial_number, "set", payload]
-        result = await self._async_post_ubus(params)
-        return result
+        return await self.async_set_state(serial_number, password, hw_temp_set=int(temperature))
 
     async def async_set_mode(
             self, serial_number: str, password: str, *, mode: YoueJiaMode
     ) -> dict[str, Any]:
         """设置设备工作模式。"""
+        return await self.async_set_state(serial_number, password, mode=mode)
+
+    async def async_set_state(self, serial_number: str, password: str, **fields: Any) -> dict[str, Any]:
+        """在一次 set 请求中同时设置多个字段（见 SET_SCHEMA），返回设备的完整状态。"""
+        result = await self.async_call(self.set_call(serial_number, password, validate_set_fields(fields)))
+        return result
+
+    async def _async_post_ubus(self, call: UbusCall) -> dict[str, Any]:
+        """向 /ubus 发送请求并解析结果，同时按方法记录延迟和结果。"""
+        self._request_id += 1
+        body = self._encoder.encode(self._request_id, call.params)
+        trace = self.tracer.start(call.method) if self.tracer is not None else None
+        start = time.monotonic()
+        await self._async_throttle(_priority(call))
+        if trace is not None:
+            trace.span("limiter", start)
+        start = time.monotonic()
+        received = 0
+        # 被取消（例如对冲中落败）的请求没有结果，outcome 保持 None，不计入统计和追踪
+        outcome: str | None = None
         try:
-            enum_mode = YoueJiaMode(mode)
-        except ValueError as err:
-            raise YoueJiaApiError(f"mode 超出范围: {mode}") from err
-
-        payload = {
-            "flavor": _DEFAULT_FLAVOR,
-            "lang": _DEFAULT_LANG,
-            "mode": int(enum_mode),
-            "p_w": password,
-            "platform": _DEFAULT_PLATFORM,
-            "version": _DEFAULT_VERSION,
-        }
-        params: list[Any] = [self.token, serial_number, "set", payload]
-        result = await self._async_post_ubus(params)
+            data, received = await self._async_post(body, trace)
+            result = self._extract_result(data)
+            outcome = OUTCOME_SUCCESS
+        except YoueJiaApiError as err:
+            outcome = _outcome(err)
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            if outcome is not None:
+                self.metrics.record(call.method, elapsed, outcome,
+                                    bytes_sent=len(body), bytes_received=received)
+                if trace is not None:
+                    self.tracer.finish(trace)
+        if call.method in _IDEMPOTENT_METHODS:
+            self._read_latency.add(elapsed)
         return result
 
-    async def _async_post_ubus(self, params: list[Any]) -> dict[str, Any]:
-        """向 /ubus 发送请求并解析结果。"""
+    async def _async_throttle(self, priority: Priority) -> None:
+        """等待限流器放行，并记录排队时间。"""
+        start = time.monotonic()
+        await self.limiter.acquire(priority)
+        self.metrics.record_wait(priority.name.lower(), time.monotonic() - start)
+
+    async def _async_post(
+            self, body: bytes, trace: CallTrace | None = None, *, batch: bool = False
+    ) -> tuple[Any, int]:
+        """发送请求体，返回解码后的 JSON 以及响应的字节数。
+
+        超时、网络异常或非 200 响应会让当前接入点进入冷却期，后续请求（包括重试）切到下一个；
+        批量请求的 4xx 表示服务端不支持批量，不算接入点故障。
+        """
         session = await self._async_get_session()
-        self._request_id += 1
-        body = {
-            "id": self._request_id,
-            "jsonrpc": _DEFAULT_JSONRPC,
-            "method": _DEFAULT_METHOD,
-            "params": params,
-        }
-        url = f"{self._base_url}{_UBUS_PATH}"
+        endpoint = self.endpoints.current
         try:
-            async with session.post(url, json=body) as response:
+            async with session.post(
+                    f"{endpoint}{_UBUS_PATH}", data=body, headers=_JSON_HEADERS, timeout=_TIMEOUT,
+                    trace_request_ctx=trace,
+            ) as response:
                 if response.status != 200:
-                    text = await response.text()
-                    raise YoueJiaApiError(
-                        f"接口返回非 200 状态码，status: {response.status}, body: {text}"
-                    )
-                data = await response.json(content_type=None)
+                    if not (batch and 400 <= response.status < 500):
+                        self.endpoints.record_failure(endpoint)
+                    raise YoueJiaHttpError(response.status, await response.text())
+                if trace is None:
+                    raw = await response.read()
+                else:
+                    with trace.measure("read"):
+                        raw = await response.read()
         except asyncio.TimeoutError as err:
-            raise YoueJiaApiError("接口请求超时") from err
+            self.endpoints.record_failure(endpoint)
+            raise YoueJiaTimeoutError("接口请求超时") from err
         except aiohttp.ClientError as err:
+            self.endpoints.record_failure(endpoint)
             raise YoueJiaApiError(f"接口请求异常: {err}") from err
 
-        result = self._extract_result(data)
-        return result
+        try:
+            if trace is None:
+                data = loads(raw)
+            else:
+                with trace.measure("decode"):
+                    data = loads(raw)
+        except ValueError as err:
+            raise YoueJiaApiError(f"响应不是合法的 JSON: {err}") from err
+
+        return data, len(raw)
+
+    async def async_probe_endpoints(self) -> None:
+        """并发探测各候选接入点的往返延迟。
+
+        向 /ubus 发送不带请求体的 HEAD 请求，不消耗限流令牌；任何非 5xx 响应都说明接入点可达。
+        """
+        session = await self._async_get_session()
+
+        async def _probe(endpoint: str) -> None:
+            start = time.monotonic()
+            try:
+                async with session.head(f"{endpoint}{_UBUS_PATH}", timeout=_PROBE_TIMEOUT) as response:
+                    healthy = response.status < 500
+            except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+                _LOGGER.debug("接入点 %s 探测失败: %s", endpoint, err)
+                healthy = False
+            self.endpoints.record_probe(endpoint, time.monotonic() - start if healthy else None)
+
+        await asyncio.gather(*(_probe(endpoint) for endpoint in self.endpoints.urls))
 
     @staticmethod
     def _extract_result(data: dict[str, Any]) -> dict[str, Any]:
         """从响应中提取结果字段。"""
-        if "result" not in data:
+        if isinstance(data, dict) and isinstance(error := data.get("error"), dict):
+            if error.get("code") == _RPC_ACCESS_DENIED:
+                raise YoueJiaAuthError(error.get("code"))
+            raise YoueJiaResultError(error.get("code"))
+        if not isinstance(data, dict) or "result" not in data:
             raise YoueJiaApiError("响应中缺少 result 字段")
 
         result = data["result"]
-        if (
-                not isinstance(result, list)
-                or len(result) < 2
-                or not isinstance(result[1], dict)
-        ):
+        if not isinstance(result, list) or not result:
             raise YoueJiaApiError(f"result 格式不正确: {result}")
 
+        # 出错时 ubus 可能只返回 [错误码]，不带结果对象
         error_code = result[0]
-        payload: dict[str, Any] = result[1]
+        if error_code in _AUTH_ERROR_CODES:
+            raise YoueJiaAuthError(error_code)
         if error_code != 0:
-            raise YoueJiaApiError(f"接口返回错误码: {error_code}")
+            raise YoueJiaResultError(error_code)
+
+        if len(result) < 2 or not isinstance(result[1], dict):
+            raise YoueJiaApiError(f"result 格式不正确: {result}")
 
+        payload: dict[str, Any] = result[1]
         return payload
 
     async def _async_get_session(self) -> aiohttp.ClientSession:
         """获取可用的 aiohttp 会话。"""
+        if self.tracer is not None and self._traced_session is not None and not self._session_owner:
+            return self._traced_session()
         if self._session is None or self._session.closed:
-            timeout = aiohttp.ClientTimeout(total=30)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            if self.connections is None:
+                self.connections = ConnectionStats()
+            trace_configs = [self.connections.trace_config()]
+            if self.tracer is not None:
+                trace_configs.append(http_trace_config())
+            self._session = create_session(trace_configs)
             self._session_owner = True
 
         return self._session
+
+
+def create_session(trace_configs: list[aiohttp.TraceConfig] | None = None) -> aiohttp.ClientSession:
+    """创建带连接池、DNS 缓存和压缩的会话（需在事件循环中调用）。"""
+    connector = aiohttp.TCPConnector(
+        limit_per_host=_LIMIT_PER_HOST,
+        keepalive_timeout=_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=_TIMEOUT,
+        headers=_SESSION_HEADERS,
+        trace_configs=trace_configs,
+    )
+
+
+def _parse_devices(payloads: list[Any]) -> tuple[list[DeviceState], dict[str, YoueJiaApiError]]:
+    """逐台解析设备字典，无效的设备记录为 YoueJiaDeviceError 并跳过。"""
+    devices: list[DeviceState] = []
+    invalid: dict[str, YoueJiaApiError] = {}
+    for payload in payloads:
+        sn = payload.get('sn') if isinstance(payload, dict) else None
+        try:
+            if not isinstance(sn, str):
+                raise YoueJiaApiError(f"缺少序列号: {str(payload)[:200]}")
+            devices.append(DeviceState.from_payload(payload))
+        except YoueJiaApiError as err:
+            _LOGGER.warning("设备 %s 返回的数据无效，本次跳过: %s", sn, err)
+            if isinstance(sn, str):
+                invalid[sn] = YoueJiaDeviceError(f"设备 {sn} 返回的数据无效: {err}")
+    return devices, invalid
+
+
+def _priority(call: UbusCall) -> Priority:
+    return _METHOD_PRIORITY.get(call.method, Priority.POLL)
+
+
+def _is_transient(err: YoueJiaApiError) -> bool:
+    """超时、网络异常和 5xx 属于可重试、计入熔断的临时故障。"""
+    if isinstance(err, YoueJiaHttpError):
+        return err.status >= 500
+    if isinstance(err, (YoueJiaResultError, YoueJiaCircuitOpenError)):
+        return False
+    return True
+
+
+def _outcome(err: YoueJiaApiError) -> str:
+    """将异常归类为统计中的结果类型。"""
+    if isinstance(err, YoueJiaTimeoutError):
+        return OUTCOME_TIMEOUT
+    if isinstance(err, YoueJiaHttpError):
+        return OUTCOME_HTTP_ERROR
+    if isinstance(err, YoueJiaResultError):
+        return OUTCOME_RESULT_ERROR
+    return OUTCOME_ERROR
+
+
+class _BatchUnsupported(Exception):
+    """服务端不支持 JSON-RPC 批量请求。"""
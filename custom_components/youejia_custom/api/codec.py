@@ -0,0 +1,83 @@
+"""ubus JSON-RPC 请求的预序列化模板与 JSON 编解码。
+
+优先使用 orjson（Home Assistant 自带），不可用时回退到标准库 json。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import json
+from typing import Any, NamedTuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+_FLAVOR = "UeHome"
+_LANG = 1
+_PLATFORM = 1
+_VERSION = 1
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """序列化为紧凑的 JSON 字节串。"""
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        """序列化为紧凑的 JSON 字节串。"""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+    loads = json.loads
+
+# 每个请求 payload 中都相同的字段
+COMMON_FIELDS = dumps({
+    "flavor": _FLAVOR,
+    "lang": _LANG,
+    "platform": _PLATFORM,
+    "version": _VERSION,
+})[1:-1]
+
+
+@lru_cache(maxsize=256)
+def _params_head(obj: str, method: str) -> bytes:
+    return dumps(obj) + b',' + dumps(method) + b',{'
+
+
+def encode_params(obj: str, method: str, fields: dict[str, Any] | None = None) -> bytes:
+    """编码 params 中 token 之后的部分：对象、方法以及 payload。"""
+    head = _params_head(obj, method)
+    if fields:
+        head += dumps(fields)[1:-1] + b','
+    return head + COMMON_FIELDS + b'}'
+
+
+def encode_params_template(obj: str, method: str, key: str) -> tuple[bytes, bytes]:
+    """返回在 payload 字段 key 的值处切开的 params 模板 (头, 尾)。"""
+    head = _params_head(obj, method) + dumps(key) + b':'
+    return head, b',' + COMMON_FIELDS + b'}'
+
+
+class UbusCall(NamedTuple):
+    """一次预编码好的 ubus 调用。"""
+
+    method: str  # ubus 方法名，如 user_dev_info、set
+    params: bytes  # encode_params 的结果
+
+
+class EnvelopeEncoder:
+    """缓存 JSON-RPC 信封中不变的部分（jsonrpc、method 以及 token）。
+
+    每次请求只需拼接 id 和预编码好的 params。
+    """
+
+    __slots__ = ('_head',)
+
+    def __init__(self, token: str) -> None:
+        self._head = b',"jsonrpc":"2.0","method":"call","params":[' + dumps(token) + b','
+
+    def encode(self, request_id: int, params: bytes) -> bytes:
+        """生成完整的请求体。"""
+        return b'{"id":%d%b%b]}' % (request_id, self._head, params)
@@ -0,0 +1,142 @@
+"""按设备合并、串行执行 set 命令的队列。"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# send(sn, password, fields)：执行一次合并后的 set 命令
+SendFn = Callable[[str, str, dict[str, Any]], Awaitable[Any]]
+# send_batch({sn: (password, fields)})：一次发出多台设备的 set，返回每台设备的结果或异常
+BatchSendFn = Callable[[dict[str, tuple[str, dict[str, Any]]]], Awaitable[dict[str, Any]]]
+
+
+class _Pending:
+    """某台设备尚未发出的命令：各字段只保留最后一次的值。"""
+
+    __slots__ = ("password", "fields", "future")
+
+    def __init__(self, password: str) -> None:
+        self.password = password
+        self.fields: dict[str, Any] = {}
+        self.future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        # 所有调用方都已取消时，避免出现 "exception was never retrieved"
+        self.future.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+
+
+class CommandQueue:
+    """每台设备一个后台 worker，同一设备的命令串行、不同设备之间并行。
+
+    新命令先在防抖窗口内等待，期间同一设备的后续命令按字段合并（后写覆盖先写），
+    窗口结束后只发出一次 set；发送过程中到达的命令进入下一批。
+    同一批的所有调用方拿到同一个结果（或同一个异常）。
+    多台设备的命令也可以作为一批一起发出（async_submit_batch），与逐台的命令同样按设备串行。
+    """
+
+    def __init__(self, send: SendFn, *, debounce: float = 0.0) -> None:
+        self._send = send
+        self.debounce = debounce
+        self._pending: dict[str, _Pending] = {}
+        self._workers: dict[str, asyncio.Task[None]] = {}
+        # 发送期间持有，保证同一设备同时只有一个 set 在执行
+        self._locks: dict[str, asyncio.Lock] = {}
+        # 被合并掉、没有单独发出的命令数
+        self.coalesced = 0
+
+    async def async_submit(self, serial_number: str, password: str, fields: dict[str, Any]) -> Any:
+        """提交命令并等待其所在批次执行完成。"""
+        pending = self._pending.get(serial_number)
+        if pending is None:
+            pending = self._pending[serial_number] = _Pending(password)
+        else:
+            self.coalesced += 1
+            pending.password = password
+        pending.fields.update(fields)
+
+        if serial_number not in self._workers:
+            self._workers[serial_number] = asyncio.create_task(
+                self._async_worker(serial_number), name=f"youejia command queue {serial_number}")
+
+        # 调用方被取消时不影响同一批的其他调用方
+        return await asyncio.shield(pending.future)
+
+    async def async_submit_batch(
+            self, commands: dict[str, tuple[str, dict[str, Any]]], send_batch: BatchSendFn
+    ) -> dict[str, Any]:
+        """把多台设备的命令作为一批发出，返回每台设备的结果或异常。
+
+        先等这些设备正在发送的 set 完成，并接管它们尚未发出的命令（字段合并，本批的值优先），
+        被接管命令的调用方拿到本批中对应设备的结果；发送期间提交的新命令排在本批之后。
+        """
+        async with AsyncExitStack() as stack:
+            # 按固定顺序加锁，避免两批命令互相等待
+            for serial_number in sorted(commands):
+                await stack.enter_async_context(self._lock(serial_number))
+
+            taken = {sn: self._pending.pop(sn) for sn in commands if sn in self._pending}
+            self.coalesced += len(taken)
+            merged = {
+                sn: (password, {**taken[sn].fields, **fields} if sn in taken else fields)
+                for sn, (password, fields) in commands.items()
+            }
+            try:
+                results = await send_batch(merged)
+            except BaseException as err:
+                for pending in taken.values():
+                    if isinstance(err, Exception):
+                        pending.future.set_exception(err)
+                    else:
+                        pending.future.cancel()
+                raise
+
+        for sn, pending in taken.items():
+            if isinstance(result := results.get(sn), Exception):
+                pending.future.set_exception(result)
+            else:
+                pending.future.set_result(result)
+        return results
+
+    def _lock(self, serial_number: str) -> asyncio.Lock:
+        if (lock := self._locks.get(serial_number)) is None:
+            lock = self._locks[serial_number] = asyncio.Lock()
+        return lock
+
+    async def _async_worker(self, serial_number: str) -> None:
+        try:
+            while serial_number in self._pending:
+                if self.debounce > 0:
+                    await asyncio.sleep(self.debounce)
+                async with self._lock(serial_number):
+                    # 等锁期间命令可能已被一批命令接管
+                    if (pending := self._pending.pop(serial_number, None)) is None:
+                        continue
+                    try:
+                        result = await self._send(serial_number, pending.password, pending.fields)
+                    except asyncio.CancelledError:
+                        pending.future.cancel()
+                        raise
+                    except Exception as err:  # noqa: BLE001 - 异常原样交给调用方
+                        pending.future.set_exception(err)
+                    else:
+                        pending.future.set_result(result)
+        finally:
+            self._workers.pop(serial_number, None)
+            if (pending := self._pending.pop(serial_number, None)) is not None:
+                pending.future.cancel()
+
+    async def async_close(self) -> None:
+        """取消所有尚未完成的命令。"""
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # 尚未开始运行就被取消的 worker 不会执行自己的清理
+        self._workers.clear()
+        for pending in self._pending.values():
+            pending.future.cancel()
+        self._pending.clear()
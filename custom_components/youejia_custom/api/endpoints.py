@@ -0,0 +1,113 @@
+"""youejia 的候选接入点：按探测延迟选择最快的可用地址，失败时切换并冷却。"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+import logging
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Endpoint:
+    """单个接入点的状态。"""
+
+    __slots__ = ("url", "latency", "cooldown_until", "failures")
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.latency: float | None = None  # 最近一次探测的延迟（秒），未探测为 None
+        self.cooldown_until = 0.0  # time.monotonic()，在此之前不使用
+        self.failures = 0
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "latency": self.latency,
+            "cooldown": max(0.0, self.cooldown_until - now),
+            "failures": self.failures,
+        }
+
+
+class EndpointPool:
+    """候选接入点集合。
+
+    优先使用不在冷却期、探测延迟最低的接入点；未探测过的按配置顺序排在已探测的之后。
+    某个接入点超时、网络异常或返回非 200 时进入冷却期，期间请求切到下一个，
+    冷却结束后重新参与选择（因此最快的接入点恢复后会自动切回）。
+    """
+
+    def __init__(self, urls: Sequence[str], *, cooldown: float = 60.0) -> None:
+        self.cooldown = cooldown
+        self._endpoints: list[Endpoint] = []
+        self._current: str | None = None
+        self.failovers = 0
+        self.update(urls)
+
+    @property
+    def urls(self) -> list[str]:
+        return [endpoint.url for endpoint in self._endpoints]
+
+    def update(self, urls: Sequence[str]) -> None:
+        """更换候选列表，保留仍在列表中的接入点的探测结果。"""
+        urls = list(dict.fromkeys(url.rstrip("/") for url in urls if url))
+        if not urls:
+            raise ValueError("至少需要一个接入点")
+        if urls == self.urls:
+            return
+        existing = {endpoint.url: endpoint for endpoint in self._endpoints}
+        self._endpoints = [existing.get(url) or Endpoint(url) for url in urls]
+
+    @property
+    def current(self) -> str:
+        """当前应使用的接入点。"""
+        now = time.monotonic()
+        ready = [
+            (index, endpoint) for index, endpoint in enumerate(self._endpoints)
+            if endpoint.cooldown_until <= now
+        ]
+        if ready:
+            _index, best = min(
+                ready,
+                key=lambda item: (item[1].latency is None, item[1].latency or 0.0, item[0]),
+            )
+        else:
+            # 全部在冷却期时，选最早结束冷却的
+            best = min(self._endpoints, key=lambda endpoint: endpoint.cooldown_until)
+
+        if best.url != self._current:
+            if self._current is not None:
+                _LOGGER.info("接入点切换: %s -> %s", self._current, best.url)
+            self._current = best.url
+        return best.url
+
+    def _get(self, url: str) -> Endpoint | None:
+        return next((endpoint for endpoint in self._endpoints if endpoint.url == url), None)
+
+    def record_failure(self, url: str) -> None:
+        """请求失败：接入点进入冷却期。"""
+        if (endpoint := self._get(url)) is None:
+            return
+        endpoint.failures += 1
+        endpoint.cooldown_until = time.monotonic() + self.cooldown
+        if len(self._endpoints) > 1:
+            self.failovers += 1
+            _LOGGER.debug("接入点 %s 请求失败，冷却 %.0f 秒", url, self.cooldown)
+
+    def record_probe(self, url: str, latency: float | None) -> None:
+        """记录探测结果；latency 为 None 表示探测失败。"""
+        if (endpoint := self._get(url)) is None:
+            return
+        if latency is None:
+            self.record_failure(url)
+            return
+        endpoint.latency = latency
+
+    def as_dict(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "current": self._current,
+            "failovers": self.failovers,
+            "endpoints": [endpoint.as_dict(now) for endpoint in self._endpoints],
+        }
@@ -0,0 +1,43 @@
+"""youejia 接口异常。"""
+
+from typing import Any
+
+
+class YoueJiaApiError(Exception):
+    """youejia 接口调用异常。"""
+
+
+class YoueJiaHttpError(YoueJiaApiError):
+    """接口返回非 200 状态码。"""
+
+    def __init__(self, status: int, body: str) -> None:
+        super().__init__(f"接口返回非 200 状态码，status: {status}, body: {body}")
+        self.status = status
+
+
+class YoueJiaTimeoutError(YoueJiaApiError):
+    """接口请求超时。"""
+
+
+class YoueJiaResultError(YoueJiaApiError):
+    """接口返回非零错误码。"""
+
+    def __init__(self, code: Any) -> None:
+        super().__init__(f"接口返回错误码: {code}")
+        self.code = code
+
+
+class YoueJiaDeviceError(YoueJiaApiError):
+    """单台设备返回的数据无效（错误码或字段不合法），不影响同一请求中的其他设备。"""
+
+
+class YoueJiaCircuitOpenError(YoueJiaApiError):
+    """熔断器打开，请求未发送。"""
+
+
+class YoueJiaAuthError(YoueJiaResultError):
+    """token 无效或已过期（ubus 权限错误），重试没有意义，需要重新认证。"""
+
+    def __init__(self, code: Any = None, message: str | None = None) -> None:
+        YoueJiaApiError.__init__(self, message or f"认证失败，错误码: {code}")
+        self.code = code
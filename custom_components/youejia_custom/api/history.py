@@ -0,0 +1,177 @@
+"""设备状态的定长时间序列，用于在本地派生加热占空比、升温速率等指标。"""
+
+from __future__ import annotations
+
+from array import array
+
+_SCALE = 10  # 温度按 0.1 °C 存为 int16
+_MISSING = -32768  # int16 的最小值表示缺失
+_MIN_RATE_SPAN = 600  # 秒，样本跨度不足时温度只变化一两个刻度，斜率没有意义
+
+
+def _encode(value: float | None) -> int:
+    return _MISSING if value is None else max(-32767, min(32767, round(value * _SCALE)))
+
+
+def _decode(value: int) -> float | None:
+    return None if value == _MISSING else value / _SCALE
+
+
+class DeviceHistory:
+    """单台设备最近 max_age 秒内（至多 capacity 次）轮询的 temp、temp_floor、is_heat 和 temp_status（目标温度）。
+
+    窗口按时长而不是样本数限定，派生指标的含义不随自适应轮询间隔变化；
+    capacity 只是内存上限，轮询间隔短于 max_age / capacity 时窗口会相应缩短。
+    样本存放在预先分配的 array 环形缓冲区中，每个样本 15 字节，内存与设备数、容量成正比。
+    派生指标依赖的累加量随样本写入和淘汰增量维护，每次轮询的开销为 O(1)；
+    浮点累加的误差在缓冲区每写满一圈时整体重算一次消除。
+    """
+
+    __slots__ = (
+        "capacity", "max_age", "_time", "_temp", "_floor", "_heat", "_target", "_head", "_count",
+        "_heat_time", "_origin", "_n", "_sx", "_sy", "_sxx", "_sxy",
+    )
+
+    def __init__(self, capacity: int, max_age: float | None = None) -> None:
+        if capacity < 2:
+            raise ValueError("capacity 至少为 2")
+        self.capacity = capacity
+        self.max_age = max_age  # 秒，None 表示只按容量淘汰
+        self._time = array("d", [0.0]) * capacity  # time.monotonic()
+        self._temp = array("h", [_MISSING]) * capacity
+        self._floor = array("h", [_MISSING]) * capacity
+        self._heat = array("b", [0]) * capacity
+        self._target = array("h", [_MISSING]) * capacity
+        self._head = 0  # 最旧样本的位置
+        self._count = 0
+        # 相邻样本之间处于加热状态的总时长（秒）
+        self._heat_time = 0.0
+        # temp 对时间做最小二乘的累加量，x 为相对 _origin 的秒数
+        self._origin = 0.0
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index(self, offset: int) -> int:
+        return (self._head + offset) % self.capacity
+
+    def append(
+            self,
+            timestamp: float,
+            temp: float | None,
+            temp_floor: float | None,
+            is_heat: bool | None,
+            target: float | None,
+    ) -> None:
+        """写入一个样本，淘汰超过 max_age 的样本；缓冲区已满时淘汰最旧的样本。"""
+        if self._count:
+            last = self._index(self._count - 1)
+            if timestamp <= self._time[last]:
+                return
+            if self._heat[last]:
+                self._heat_time += timestamp - self._time[last]
+        else:
+            self._origin = timestamp
+
+        if self._count == self.capacity:
+            self._evict()
+
+        index = self._index(self._count)
+        self._time[index] = timestamp
+        self._temp[index] = _encode(temp)
+        self._floor[index] = _encode(temp_floor)
+        self._heat[index] = bool(is_heat)
+        self._target[index] = _encode(target)
+        self._count += 1
+        self._accumulate(index, 1)
+        # 写入新样本之后再按时长淘汰，_evict 需要被淘汰样本的下一个样本
+        if self.max_age is not None:
+            while self._count > 1 and timestamp - self._time[self._head] > self.max_age:
+                self._evict()
+
+        if index == self.capacity - 1:
+            self._resync()
+
+    def _evict(self) -> None:
+        oldest = self._head
+        if self._heat[oldest]:
+            self._heat_time -= self._time[self._index(1)] - self._time[oldest]
+        self._accumulate(oldest, -1)
+        self._head = self._index(1)
+        self._count -= 1
+
+    def _accumulate(self, index: int, sign: int) -> None:
+        if (y := _decode(self._temp[index])) is None:
+            return
+        x = self._time[index] - self._origin
+        self._n += sign
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxx += sign * x * x
+        self._sxy += sign * x * y
+
+    def _resync(self) -> None:
+        """按当前样本重算所有累加量，并把时间原点移到最旧的样本。"""
+        self._origin = self._time[self._head]
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._heat_time = 0.0
+        for offset in range(self._count):
+            index = self._index(offset)
+            self._accumulate(index, 1)
+            if offset and self._heat[previous := self._index(offset - 1)]:
+                self._heat_time += self._time[index] - self._time[previous]
+
+    @property
+    def span(self) -> float:
+        """最旧和最新样本之间的时长（秒）。"""
+        if self._count < 2:
+            return 0.0
+        return self._time[self._index(self._count - 1)] - self._time[self._head]
+
+    @property
+    def temp(self) -> float | None:
+        return _decode(self._temp[self._index(self._count - 1)]) if self._count else None
+
+    @property
+    def temp_floor(self) -> float | None:
+        return _decode(self._floor[self._index(self._count - 1)]) if self._count else None
+
+    @property
+    def target(self) -> float | None:
+        return _decode(self._target[self._index(self._count - 1)]) if self._count else None
+
+    @property
+    def is_heat(self) -> bool:
+        return bool(self._count and self._heat[self._index(self._count - 1)])
+
+    @property
+    def duty_cycle(self) -> float | None:
+        """窗口内处于加热状态的时间占比（0~1）。"""
+        span = self.span
+        return self._heat_time / span if span > 0 else None
+
+    @property
+    def temperature_rate(self) -> float | None:
+        """窗口内温度变化的趋势（°C/小时），为 temp 对时间的最小二乘斜率。"""
+        if self._n < 2 or self.span < _MIN_RATE_SPAN:
+            return None
+        denominator = self._n * self._sxx - self._sx * self._sx
+        if denominator <= 0:
+            return None
+        return (self._n * self._sxy - self._sx * self._sy) / denominator * 3600
+
+    @property
+    def time_to_target(self) -> float | None:
+        """按当前升温速率到达目标温度的预计时长（秒）；已达到时为 0，未在升温时为 None。"""
+        temp, target = self.temp, self.target
+        if temp is None or target is None:
+            return None
+        if temp >= target:
+            return 0.0
+        rate = self.temperature_rate
+        if not self.is_heat or rate is None or rate <= 0:
+            return None
+        return (target - temp) / rate * 3600
@@ -0,0 +1,169 @@
+"""youejia 接口调用的统计：延迟直方图、各类结果计数与报文大小。"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+import aiohttp
+
+# 延迟直方图的桶上界（秒），最后一个桶收纳所有更大的值
+LATENCY_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_HTTP_ERROR = "http_error"  # 非 200 状态码
+OUTCOME_RESULT_ERROR = "result_error"  # 非零错误码
+OUTCOME_ERROR = "error"  # 网络异常、响应格式错误等
+
+OUTCOMES = (OUTCOME_SUCCESS, OUTCOME_TIMEOUT, OUTCOME_HTTP_ERROR, OUTCOME_RESULT_ERROR, OUTCOME_ERROR)
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图。"""
+
+    __slots__ = ("buckets", "count", "total", "max", "last")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: float | None = None
+
+    def record(self, seconds: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float | None:
+        """按桶上界估算分位数（q 取 0~1）。"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else None,
+            "max": self.max,
+            "last": self.last,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": {
+                **{f"le_{bound}": hits for bound, hits in zip(LATENCY_BUCKETS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class MethodStats:
+    """单个 ubus 方法的统计。"""
+
+    __slots__ = ("latency", "outcomes", "bytes_sent", "bytes_received")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "latency": self.latency.as_dict(),
+            "outcomes": dict(self.outcomes),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+class ApiMetrics:
+    """按方法（user_dev_info、user_get_info、set、batch）汇总的接口统计。"""
+
+    def __init__(self) -> None:
+        self.methods: dict[str, MethodStats] = {}
+        self.hedged_requests = 0  # 因超过 p95 而发出的对冲请求数
+        self.retries = 0  # 重试次数
+        self.rejected = 0  # 熔断期间被拒绝的请求数
+        # 按优先级（command、poll、discovery）统计的限流排队时间
+        self.limiter_wait: dict[str, LatencyHistogram] = {}
+
+    def record(
+            self, method: str, seconds: float, outcome: str, *, bytes_sent: int, bytes_received: int
+    ) -> None:
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        stats.latency.record(seconds)
+        stats.outcomes[outcome] += 1
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+
+    def record_wait(self, priority: str, seconds: float) -> None:
+        histogram = self.limiter_wait.get(priority)
+        if histogram is None:
+            histogram = self.limiter_wait[priority] = LatencyHistogram()
+        histogram.record(seconds)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(stats.latency.count for stats in self.methods.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(
+            count
+            for stats in self.methods.values()
+            for outcome, count in stats.outcomes.items()
+            if outcome != OUTCOME_SUCCESS
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "methods": {method: stats.as_dict() for method, stats in self.methods.items()},
+            "hedged_requests": self.hedged_requests,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "limiter_wait": {priority: wait.as_dict() for priority, wait in self.limiter_wait.items()},
+        }
+
+
+class ConnectionStats:
+    """会话的连接复用统计：新建连接数与复用 keep-alive 连接数。"""
+
+    __slots__ = ("created", "reused")
+
+    def __init__(self) -> None:
+        self.created = 0
+        self.reused = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """挂到会话上、用于计数的 TraceConfig。"""
+        config = aiohttp.TraceConfig()
+
+        async def _created(session: Any, ctx: Any, params: Any) -> None:
+            self.created += 1
+
+        async def _reused(session: Any, ctx: Any, params: Any) -> None:
+            self.reused += 1
+
+        config.on_connection_create_end.append(_created)
+        config.on_connection_reuseconn.append(_reused)
+        return config
+
+    @property
+    def reuse_ratio(self) -> float | None:
+        total = self.created + self.reused
+        return self.reused / total if total else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"created": self.created, "reused": self.reused, "reuse_ratio": self.reuse_ratio}
@@ -0,0 +1,204 @@
+"""youejia 设备状态模型。"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields, replace
+from enum import IntEnum
+from typing import Any, ClassVar
+
+from .codec import dumps, loads
+from .exceptions import YoueJiaApiError
+
+
+class YoueJiaMode(IntEnum):
+    """工作模式枚举。"""
+
+    CONSTANT = 0  # 恒温模式
+    SMART = 1  # 智能模式
+    VACATION = 2  # 休假模式
+
+
+# 集成用到的字段及其在接口中的类型，与 api/doc 下 user_dev_info、set 响应的 schema 保持一致
+_SCHEMA: dict[str, type] = {
+    'sn': str,
+    'nickname': str,
+    'offline': bool,
+    'k_close': bool,
+    'is_heat': bool,
+    'temp': str,
+    'temp_status': int,
+    'hw_temp_set': int,
+    'mode': int,
+    'is_key_lock': bool,
+    'temp_floor': str,
+    'temp_max': int,
+    'temp_min': int,
+    'temp_avg': int,
+    'rssi': int,
+    'E_price': str,
+    'E_FGP': list,
+}
+
+
+def _float(value: str) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _floats(values: list[str]) -> tuple[float | None, ...]:
+    return tuple(_float(value) for value in values)
+
+
+def _mode(value: int) -> YoueJiaMode | None:
+    # 固件新增的模式不影响其他字段，按未知处理
+    try:
+        return YoueJiaMode(value)
+    except ValueError:
+        return None
+
+
+def _money(value: float | None) -> str:
+    return f"{value:.2f}" if value is not None else ""
+
+
+# 字段从接口原始值到模型值的转换
+_CONVERTERS: dict[str, Any] = {
+    'temp': _float,
+    'temp_status': float,
+    'mode': _mode,
+    'temp_floor': _float,
+    'E_price': _float,
+    'E_FGP': _floats,
+}
+
+# 模型值还原为接口原始值
+_ENCODERS: dict[str, Any] = {
+    'temp': str,
+    'temp_status': int,
+    'mode': int,
+    'temp_floor': str,
+    'E_price': _money,
+    'E_FGP': lambda values: [_money(value) for value in values],
+}
+
+
+def _validate(key: str, value: Any) -> None:
+    _validate_type(key, value, _SCHEMA[key])
+
+
+def _validate_type(key: str, value: Any, expected: type) -> None:
+    # bool 是 int 的子类，需要单独排除
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise YoueJiaApiError(f"字段 {key} 类型不正确，期望 {expected.__name__}: {value!r}")
+
+
+# set 接口可写的字段及类型，对应 api/doc 中开关机、设置温度、设置工作模式的请求 schema
+SET_SCHEMA: dict[str, type] = {
+    'k_close': bool,
+    'hw_temp_set': int,
+    'mode': int,
+}
+
+
+def validate_set_fields(fields: dict[str, Any]) -> dict[str, Any]:
+    """校验一次 set 要写入的字段，返回可直接编码的 payload。"""
+    if not fields:
+        raise YoueJiaApiError("set 至少需要一个字段")
+
+    payload: dict[str, Any] = {}
+    for key, value in fields.items():
+        if key not in SET_SCHEMA:
+            raise YoueJiaApiError(f"字段 {key} 不支持设置")
+        # 温度等整数字段允许传入整数值的 float（例如 HA 的 22.0）
+        if SET_SCHEMA[key] is int and isinstance(value, float) and value.is_integer():
+            value = int(value)
+        _validate_type(key, value, SET_SCHEMA[key])
+        if key == 'mode':
+            try:
+                value = YoueJiaMode(value)
+            except ValueError as err:
+                raise YoueJiaApiError(f"mode 超出范围: {value}") from err
+        payload[key] = int(value) if SET_SCHEMA[key] is int else value
+    return payload
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceState:
+    """单个设备的状态，字段已转换为 float/bool/枚举。
+
+    只保留集成使用的字段，其余字段压缩为 JSON 存放在 extras 中，按需解码。
+    """
+
+    FIELDS: ClassVar[tuple[str, ...]] = tuple(_SCHEMA)
+
+    sn: str | None = None
+    nickname: str | None = None
+    offline: bool = False
+    k_close: bool = False
+    is_heat: bool = False
+    temp: float | None = None
+    temp_status: float | None = None
+    hw_temp_set: int | None = None
+    mode: YoueJiaMode | None = None
+    is_key_lock: bool = False
+    temp_floor: float | None = None
+    temp_max: int | None = None
+    temp_min: int | None = None
+    temp_avg: int | None = None
+    rssi: int | None = None
+    E_price: float | None = None  # 电费
+    E_FGP: tuple[float | None, ...] | None = None  # 峰、谷、平电费
+    _extras: bytes = field(default=b'{}', repr=False, compare=False)
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> DeviceState:
+        """从接口返回的设备字典解析出设备状态。"""
+        return cls().merge(payload)
+
+    def merge(self, payload: dict[str, Any]) -> DeviceState:
+        """合并（部分）设备字典，返回新的设备状态。"""
+        if payload.get('code', 0) != 0:
+            raise YoueJiaApiError(f"设备返回错误码: {payload.get('code')}")
+
+        changes: dict[str, Any] = {}
+        extras: dict[str, Any] = {}
+        for key, value in payload.items():
+            if key not in _SCHEMA:
+                extras[key] = value
+                continue
+            if value is None:
+                # 离线设备的部分字段为 null：可空字段置为 None，其余字段保留原值
+                if key in _NULLABLE:
+                    changes[key] = None
+                continue
+            _validate(key, value)
+            try:
+                changes[key] = _CONVERTERS[key](value) if key in _CONVERTERS else value
+            except ValueError as err:
+                raise YoueJiaApiError(f"字段 {key} 取值无效: {value!r}") from err
+
+        if extras:
+            changes['_extras'] = dumps({**self.extras, **extras})
+        return replace(self, **changes)
+
+    @property
+    def extras(self) -> dict[str, Any]:
+        """未建模的其余字段（每次调用都会重新解码）。"""
+        return loads(self._extras)
+
+    def as_payload(self) -> dict[str, Any]:
+        """还原为接口格式的设备字典。"""
+        payload = self.extras
+        for item in fields(self):
+            if item.name == '_extras' or (value := getattr(self, item.name)) is None:
+                continue
+            if item.name in _ENCODERS:
+                value = _ENCODERS[item.name](value)
+            payload[item.name] = value
+        return payload
+
+
+# 缺失时取 None 的字段
+_NULLABLE = frozenset(item.name for item in fields(DeviceState) if item.default is None)
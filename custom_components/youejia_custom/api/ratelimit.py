@@ -0,0 +1,87 @@
+"""youejia 客户端的限流：按优先级排队的令牌桶。"""
+
+from __future__ import annotations
+
+import asyncio
+from enum import IntEnum
+import heapq
+import itertools
+import time
+
+
+class Priority(IntEnum):
+    """请求优先级，数值越小越先拿到令牌。"""
+
+    COMMAND = 0  # 用户命令（set）
+    POLL = 1  # 定时轮询
+    DISCOVERY = 2  # 后台发现（用户信息、设备列表）
+
+
+class PriorityRateLimiter:
+    """令牌桶限流器，由同一账号的所有请求共享。
+
+    令牌按 rate（个/秒）匀速补充，最多积攒 burst 个；令牌不足时请求排队，
+    队列按优先级、同优先级按到达顺序放行，因此轮询和发现请求再多也不会饿死用户命令。
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def idle(self) -> bool:
+        """当前是否可以立即放行（有令牌且无人排队）。"""
+        self._refill()
+        return not self._waiters and self._tokens >= 1
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, priority: Priority) -> None:
+        """取得一个令牌，必要时按优先级排队等待。"""
+        if self.idle:
+            self._tokens -= 1
+            return
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._schedule()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 令牌已经分配给了本请求，归还给后面的请求
+                self._tokens += 1
+                self._schedule()
+            raise
+
+    def _schedule(self) -> None:
+        """把可用的令牌按优先级分给排队的请求，不够时在下一个令牌补充后再调度。"""
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            *_, fut = heapq.heappop(self._waiters)
+            if fut.done():  # 已被取消
+                continue
+            self._tokens -= 1
+            fut.set_result(None)
+
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._waiters:
+            delay = (1 - self._tokens) / self._rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._schedule)
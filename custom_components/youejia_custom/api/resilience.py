@@ -0,0 +1,88 @@
+"""youejia 客户端的容错组件：滚动延迟统计与熔断器。"""
+
+from __future__ import annotations
+
+from collections import deque
+import logging
+import random
+import time
+
+from .exceptions import YoueJiaCircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RollingLatency:
+    """最近 N 次成功请求的延迟，用于估算 p95。"""
+
+    __slots__ = ("_samples", "_min_samples")
+
+    def __init__(self, size: int = 100, min_samples: int = 20) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """样本不足时返回 None。"""
+        if len(self._samples) < self._min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """第 attempt 次重试前的等待时间（指数退避 + 抖动）。"""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后熔断，冷却一段时间后放行一次试探请求。"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """请求前检查，熔断期间直接抛出 YoueJiaCircuitOpenError。"""
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise YoueJiaCircuitOpenError(f"接口熔断中，{remaining:.0f} 秒后重试")
+            self.state = self.HALF_OPEN
+        # 半开状态只放行一个试探请求
+        if self._probing:
+            raise YoueJiaCircuitOpenError("接口熔断中，正在试探恢复")
+        self._probing = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            _LOGGER.info("接口已恢复，关闭熔断")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self) -> None:
+        """请求被取消、未产生结果时释放试探名额。"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                _LOGGER.warning("接口连续失败 %s 次，熔断 %s 秒", self.failures, self.reset_timeout)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
@@ -0,0 +1,26 @@
+"""youejia 的 JWT token 工具。"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+
+
+def token_expiry(token: str) -> float | None:
+    """在本地解析 JWT payload 中的 exp（Unix 时间戳，秒），不校验签名。
+
+    token 不是 JWT 或没有 exp 时返回 None。
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    segment = parts[1]
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    exp = payload.get("exp") if isinstance(payload, dict) else None
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return None
+    return float(exp)
@@ -0,0 +1,122 @@
+"""可选的请求追踪：记录单次调用各阶段耗时，只保留最慢的 N 次。
+
+未启用时客户端和协调器不会创建任何追踪对象，请求使用的会话上也不挂 http_trace_config：
+客户端自建的会话在开关追踪时重建，使用集成共享会话的客户端改用单独的追踪会话。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import heapq
+import itertools
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+
+class CallTrace:
+    """一次调用（请求或轮询）的各阶段耗时。"""
+
+    __slots__ = ("name", "started", "_origin", "spans", "duration")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = time.time()
+        self._origin = time.monotonic()
+        # (阶段, 相对开始的偏移, 耗时)，单位秒
+        self.spans: list[tuple[str, float, float]] = []
+        self.duration = 0.0
+
+    def span(self, name: str, start: float, end: float | None = None) -> None:
+        """记录一个阶段，start/end 为 time.monotonic()。"""
+        end = time.monotonic() if end is None else end
+        self.spans.append((name, start - self._origin, end - start))
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.span(name, start)
+
+    def finish(self) -> None:
+        self.duration = time.monotonic() - self._origin
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [
+                {"name": name, "offset_ms": round(offset * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, offset, duration in self.spans
+            ],
+        }
+
+
+# aiohttp 的 (阶段, 开始信号, 结束信号)；connect 包含 TCP 建连和 TLS 握手
+_HTTP_PHASES = (
+    ("connection_queued", "on_connection_queued_start", "on_connection_queued_end"),
+    ("dns", "on_dns_resolvehost_start", "on_dns_resolvehost_end"),
+    ("connect", "on_connection_create_start", "on_connection_create_end"),
+    ("server", "on_request_headers_sent", "on_request_end"),
+)
+
+
+def _begin(phase: str):
+    async def handler(session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any) -> None:
+        if ctx.trace_request_ctx is not None:
+            setattr(ctx, phase, time.monotonic())
+    return handler
+
+
+def _end(phase: str):
+    async def handler(session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any) -> None:
+        trace = ctx.trace_request_ctx
+        if isinstance(trace, CallTrace) and (start := getattr(ctx, phase, None)) is not None:
+            trace.span(phase, start)
+    return handler
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """记录 aiohttp 各阶段耗时的 TraceConfig；请求未携带 CallTrace 时处理函数直接返回。"""
+    config = aiohttp.TraceConfig()
+    for phase, start_signal, end_signal in _HTTP_PHASES:
+        getattr(config, start_signal).append(_begin(phase))
+        getattr(config, end_signal).append(_end(phase))
+    return config
+
+
+class Tracer:
+    """追踪器：保留耗时最长的 capacity 次调用。"""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        # 最小堆，堆顶是已保留的调用中最快的一次
+        self._slowest: list[tuple[float, int, CallTrace]] = []
+        self._seq = itertools.count()
+        self.recorded = 0
+
+    def start(self, name: str) -> CallTrace:
+        return CallTrace(name)
+
+    def finish(self, trace: CallTrace) -> None:
+        """结束一次调用，比已保留的最快一次更慢时替换它。"""
+        trace.finish()
+        self.recorded += 1
+        item = (trace.duration, next(self._seq), trace)
+        if len(self._slowest) < self.capacity:
+            heapq.heappush(self._slowest, item)
+        elif trace.duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "slowest": [trace.as_dict() for *_, trace in sorted(self._slowest, reverse=True)],
+        }
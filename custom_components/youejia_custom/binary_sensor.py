@@ -0,0 +1,101 @@
+"""youejia 的设备二元传感器。"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import YouEJiaConfigEntry, YouEJiaCoordinator
+from .api import DeviceState
+from .const import DATA_KEY_NAME, DATA_KEY_SN
+from .entity import YouEJiaDeviceEntity, async_add_device_entities
+
+
+@dataclass(frozen=True, kw_only=True)
+class YouEJiaBinarySensorDescription(BinarySensorEntityDescription):
+    """描述一个基于设备快照字段的二元传感器。"""
+
+    field: str  # 依赖的 DeviceState 字段
+    value_fn: Callable[[DeviceState], bool]
+
+
+BINARY_SENSORS: tuple[YouEJiaBinarySensorDescription, ...] = (
+    YouEJiaBinarySensorDescription(
+        key="is_heat",
+        name="加热中",
+        device_class=BinarySensorDeviceClass.HEAT,
+        field="is_heat",
+        value_fn=lambda state: state.is_heat,
+    ),
+    YouEJiaBinarySensorDescription(
+        key="is_key_lock",
+        name="童锁",
+        # LOCK 类型中 on 表示未锁定
+        device_class=BinarySensorDeviceClass.LOCK,
+        field="is_key_lock",
+        value_fn=lambda state: not state.is_key_lock,
+    ),
+    YouEJiaBinarySensorDescription(
+        key="online",
+        name="在线",
+        device_class=BinarySensorDeviceClass.CONNECTIVITY,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        field="offline",
+        value_fn=lambda state: not state.offline,
+    ),
+)
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        config: YouEJiaConfigEntry,
+        add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the binary sensor platform."""
+    async_add_device_entities(hass, config, add_entities, lambda dev: [
+        YouEJiaBinarySensor(config.runtime_data, dev[DATA_KEY_SN], dev[DATA_KEY_NAME], description)
+        for description in BINARY_SENSORS
+    ])
+
+
+class YouEJiaBinarySensor(YouEJiaDeviceEntity, BinarySensorEntity):
+    """设备快照中某一字段的二元传感器，只订阅该字段。"""
+
+    entity_description: YouEJiaBinarySensorDescription
+    _attr_has_entity_name = True
+
+    def __init__(
+            self,
+            coordinator: YouEJiaCoordinator,
+            sn: str,
+            device_name: str,
+            description: YouEJiaBinarySensorDescription,
+    ) -> None:
+        super().__init__(coordinator, sn, device_name)
+        self.entity_description = description
+        self._attr_unique_id = f"{sn}_{description.key}"
+        self._projected_fields = frozenset({description.field})
+
+    @property
+    def available(self) -> bool:
+        if self.entity_description.field == "offline":
+            # 在线状态本身在设备离线时也要能显示
+            return (
+                self.coordinator.last_update_success
+                and self.sn in self.coordinator.data
+                and self.sn not in self.coordinator.failed_devices
+            )
+        return super().available
+
+    @property
+    def is_on(self) -> bool:
+        return self.entity_description.value_fn(self.device_state)
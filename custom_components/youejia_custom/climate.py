@@ -2,6 +2,7 @@ import logging
 from typing import Any
 
 from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
     PRESET_BOOST,
     ClimateEntity,
     ClimateEntityFeature,
@@ -13,8 +14,8 @@ from homeassistant.const import ATTR_TEMPERATURE
 from homeassistant.const import UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from . import const
+from .entity import YouEJiaDeviceEntity, async_add_device_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,12 +26,13 @@ async def async_setup_entry(
         add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the sensor platform."""
-    devices: list[dict[str, Any]] = config.options.get('include_devices')
-    add_entities([ElectricHeater(config.runtime_data, dev[const.DATA_KEY_NAME], dev[const.DATA_KEY_SN],
-                                 dev[const.DATA_KEY_PASSWD]) for dev in devices if dev])
+    async_add_device_entities(hass, config, add_entities, lambda dev: [
+        ElectricHeater(config.runtime_data, dev[const.DATA_KEY_NAME], dev[const.DATA_KEY_SN],
+                       dev[const.DATA_KEY_PASSWD])
+    ])
 
 
-class ElectricHeater(CoordinatorEntity, ClimateEntity):
+class ElectricHeater(YouEJiaDeviceEntity, ClimateEntity):
     """电取暖器实现"""
 
     _NORMAL_PRESET = "正常"
@@ -47,44 +49,34 @@ class ElectricHeater(CoordinatorEntity, ClimateEntity):
     _attr_min_temp = 10.0
     _attr_max_temp = 28.0
     _attr_target_temperature_step = 1.0
+    # 本实体状态依赖的设备字段，只有这些字段变化时才写入状态
+    _projected_fields = frozenset({'k_close', 'temp', 'temp_status', 'is_heat'})
 
     def __init__(self, coordinator: YouEJiaCoordinator, name, sn, password=''):
-        super().__init__(coordinator)
+        super().__init__(coordinator, sn, name)
 
         self._attr_name = name
         self._attr_unique_id = f"{sn}_youejia_thermostat"
-        self._sn = sn
         self._password = password
 
         self._target_temp = 20.0  # 默认目标温度
         self._last_temp: float | None = None  # 记录进入强制模式前的温度
 
-    @property
-    def sn(self):
-        return self._sn
-
     @property
     def password(self):
         return self._password
 
     @property
     def hvac_mode(self) -> HVACMode:
-        device_data = self.coordinator.data.get(self.sn)
-        k_close = device_data.get('k_close')
-
-        return HVACMode.HEAT if not bool(k_close) else HVACMode.OFF
+        return HVACMode.OFF if self.device_state.k_close else HVACMode.HEAT
 
     @property
     def current_temperature(self) -> float | None:
-        device_data = self.coordinator.data.get(self.sn)
-        temp_str = device_data.get('temp')
-        return float(temp_str)
+        return self.device_state.temp
 
     @property
     def target_temperature(self) -> float | None:
-        device_data = self.coordinator.data.get(self.sn)
-        temp_str = device_data.get('temp_status')
-        return float(temp_str)
+        return self.device_state.temp_status
 
     @property
     def preset_modes(self) -> list[str]:
@@ -94,7 +86,7 @@ class ElectricHeater(CoordinatorEntity, ClimateEntity):
     @property
     def preset_mode(self) -> str:
         """判断当前是否处于强制加热模式。"""
-        if self.target_temperature == self._FORCE_TEMPERATURE:
+        if self.device_state.temp_status == self._FORCE_TEMPERATURE:
             return self._FORCE_PRESET
         return self._NORMAL_PRESET
 
@@ -105,41 +97,39 @@ class ElectricHeater(CoordinatorEntity, ClimateEntity):
     @property
     def hvac_action(self) -> HVACAction:
         """返回当前的动作 (UI 靠这个来决定图标准不准亮)."""
-        if self.hvac_mode == HVACMode.OFF:
+        state = self.device_state
+        if state.k_close:
             return HVACAction.OFF
 
-        device_data = self.coordinator.data.get(self.sn)
-        is_heat = device_data.get('is_heat')
-
-        if is_heat:
+        if state.is_heat:
             return HVACAction.HEATING
-        else:
-            return HVACAction.IDLE # 达温停机
-
-        # 兜底
-        return HVACAction.IDLE
+        return HVACAction.IDLE # 达温停机
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
-        if hvac_mode == HVACMode.HEAT:
-            # 调用设备API打开取暖器
-            _is_on = True
-        else:
-            # 调用设备API关闭取暖器
-            _is_on = False
-
-        if self.sn in self.coordinator.data:
-            self.coordinator.data[self.sn]['k_close'] = not _is_on
-
-        self.async_write_ha_state()
-
-        self.coordinator.data[self.sn] = await self.api.async_set_power(self.sn, self._password, power_on=_is_on)
+        await self._async_set_state(hvac_mode=hvac_mode)
 
     async def async_set_temperature(self, **kwargs) -> None:
-        if temperature := kwargs.get(ATTR_TEMPERATURE):
+        # climate.set_temperature 可同时指定 hvac_mode，例如开机并设置温度，合并为一次 set
+        await self._async_set_state(temperature=kwargs.get(ATTR_TEMPERATURE), hvac_mode=kwargs.get(ATTR_HVAC_MODE))
+
+    async def _async_set_state(self, *, temperature: float | None = None, hvac_mode: HVACMode | None = None) -> None:
+        """在一次 set 中设置开关机和/或目标温度。"""
+        fields: dict[str, Any] = {}
+        optimistic: dict[str, Any] = {}
+        if hvac_mode is not None:
+            # 调用设备API打开/关闭取暖器
+            fields['k_close'] = optimistic['k_close'] = hvac_mode != HVACMode.HEAT
+        if temperature is not None:
             self._target_temp = temperature
-            # 调用设备API设置目标温度
-        self.coordinator.data[self.sn] = await self.api.async_set_temperature(self.sn, self._password, temperature=temperature)
-        await self.coordinator.async_request_refresh()
+            fields['hw_temp_set'] = optimistic['temp_status'] = int(temperature)
+        if not fields:
+            return
+
+        # 先乐观更新界面，再以 set 返回的完整状态为准；连续调节时命令队列只会发出最后一次的值
+        if self.sn in self.coordinator.data:
+            self.coordinator.async_apply_device_state(self.sn, optimistic)
+
+        await self.coordinator.async_send_command(self.sn, self._password, fields)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """处理预设模式切换。"""
@@ -148,7 +138,8 @@ class ElectricHeater(CoordinatorEntity, ClimateEntity):
             current = self.target_temperature
             if current is not None:
                 self._last_temp = current
-            await self.async_set_temperature(temperature=self._FORCE_TEMPERATURE)
+            # 关机状态下进入强制加热时，开机和设置温度合并为一次 set
+            await self._async_set_state(temperature=self._FORCE_TEMPERATURE, hvac_mode=HVACMode.HEAT)
             return
 
         # 恢复为普通模式，优先恢复记忆温度，否则设为 22℃
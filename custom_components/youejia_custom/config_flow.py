@@ -2,19 +2,44 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigEntryState,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
 from homeassistant.exceptions import HomeAssistantError
 from . import YoueJiaApiClient
 from . import const
-
-from .const import DOMAIN
+from .api import DEFAULT_BASE_URL, YoueJiaApiError, YoueJiaAuthError
+from .session import async_get_shared_session
+
+from .const import (
+    CONF_COMMAND_DEBOUNCE,
+    CONF_ENDPOINTS,
+    CONF_FAST_INTERVAL,
+    CONF_MAX_CONCURRENCY,
+    CONF_SCAN_INTERVAL,
+    CONF_SHARD_SIZE,
+    CONF_SLOW_INTERVAL,
+    CONF_TRACING,
+    DEFAULT_COMMAND_DEBOUNCE,
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SHARD_SIZE,
+    DEFAULT_SLOW_INTERVAL,
+    DOMAIN,
+)
 from homeassistant.const import CONF_TOKEN
 
 _LOGGER = logging.getLogger(__name__)
@@ -110,10 +135,19 @@ class PlaceholderHub:
         }]
 
 
+STEP_REAUTH_DATA_SCHEMA = vol.Schema({vol.Required(CONF_TOKEN): str})
+
+
 async def validate_input(hass: HomeAssistant, user_input: dict[str, Any]) -> dict[str, Any]:
-    _api_client = YoueJiaApiClient(user_input[CONF_TOKEN], user_input[_CONF_USER_ID])
-    user_info = await _api_client.async_get_user_info()
-    await _api_client.async_close()
+    # 复用集成共享的会话，避免每次尝试都重新建连
+    _api_client = YoueJiaApiClient(user_input[CONF_TOKEN], user_input[_CONF_USER_ID],
+                                   session=async_get_shared_session(hass).session)
+    try:
+        user_info = await _api_client.async_get_user_info()
+    except YoueJiaAuthError as err:
+        raise InvalidAuth from err
+    except YoueJiaApiError as err:
+        raise CannotConnect from err
     return user_info
 
 class ConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -124,6 +158,12 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
     def __init__(self):
         self.device_list: list[dict[str, Any]] = []
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """返回选项流程。"""
+        return YouEJiaOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -143,7 +183,7 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
             else:
                 if user_info['devices']:
                     for dev in user_info['devices']:
-                        if dev['type'] == 29:
+                        if dev['type'] == const.DEVICE_TYPE_HEATER:
                             _LOGGER.info("找到YoueJia设备, name: %s, sn: %s", dev['nickname'], dev[const.DATA_KEY_NAME])
                             self.device_list.append(dev)
                 return await self.async_step_devices()
@@ -200,6 +240,128 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
 
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> ConfigFlowResult:
+        """token 失效或即将过期时重新认证。"""
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """输入新的 token，user_id 保持不变。"""
+        errors: dict[str, str] = {}
+        entry = self._get_reauth_entry()
+        user_id = entry.data['api_data'][_CONF_USER_ID]
+        if user_input is not None:
+            api_data = {**entry.data['api_data'], CONF_TOKEN: user_input[CONF_TOKEN]}
+            try:
+                await validate_input(self.hass, api_data)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except Exception:
+                _LOGGER.exception("发生未预期异常")
+                errors["base"] = "unknown"
+            else:
+                # 同一账号的其他 entry 共用 token，一并更新
+                for other in self.hass.config_entries.async_entries(DOMAIN):
+                    if other.entry_id != entry.entry_id and other.data['api_data'][_CONF_USER_ID] == user_id:
+                        self.hass.config_entries.async_update_entry(other, data={**other.data, 'api_data': api_data})
+                return self.async_update_reload_and_abort(entry, data_updates={'api_data': api_data})
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=STEP_REAUTH_DATA_SCHEMA,
+            errors=errors,
+            description_placeholders={"user_id": user_id},
+        )
+
+
+class YouEJiaOptionsFlow(OptionsFlow):
+    """处理 youejia 的选项：轮询等设置，以及增删设备。"""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """选择要修改的选项。"""
+        return self.async_show_menu(step_id="init", menu_options=["settings", "devices"])
+
+    async def async_step_settings(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """配置自适应轮询的各档间隔及分片查询参数。"""
+        if user_input is not None:
+            # 保留 include_devices 等已有选项
+            return self.async_create_entry(data={**self.config_entry.options, **user_input})
+
+        options = self.config_entry.options
+        interval = vol.All(vol.Coerce(int), vol.Range(min=1, max=3600))
+        schema = vol.Schema({
+            vol.Required(CONF_FAST_INTERVAL,
+                         default=options.get(CONF_FAST_INTERVAL, DEFAULT_FAST_INTERVAL)): interval,
+            vol.Required(CONF_SCAN_INTERVAL,
+                         default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)): interval,
+            vol.Required(CONF_SLOW_INTERVAL,
+                         default=options.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL)): interval,
+            vol.Required(CONF_SHARD_SIZE,
+                         default=options.get(CONF_SHARD_SIZE, DEFAULT_SHARD_SIZE)):
+                vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+            vol.Required(CONF_MAX_CONCURRENCY,
+                         default=options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)):
+                vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+            vol.Required(CONF_COMMAND_DEBOUNCE,
+                         default=options.get(CONF_COMMAND_DEBOUNCE, DEFAULT_COMMAND_DEBOUNCE)):
+                vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+            vol.Required(CONF_TRACING, default=options.get(CONF_TRACING, False)): bool,
+            # 候选接入点，有多个时按探测延迟选择最快的，失败时自动切换
+            vol.Required(CONF_ENDPOINTS, default=options.get(CONF_ENDPOINTS) or [DEFAULT_BASE_URL]):
+                selector.TextSelector(selector.TextSelectorConfig(
+                    type=selector.TextSelectorType.URL, multiple=True)),
+        })
+        return self.async_show_form(step_id="settings", data_schema=schema)
+
+    async def async_step_devices(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """重新发现账号下的取暖器并增删；保存后增量生效，不重新加载 entry。"""
+        entry = self.config_entry
+        if entry.state is not ConfigEntryState.LOADED:
+            return self.async_abort(reason="not_loaded")
+
+        errors: dict[str, str] = {}
+        current = {dev[const.DATA_KEY_SN]: dev for dev in entry.options.get('include_devices') or [] if dev}
+        try:
+            discovered = await entry.runtime_data.async_discover_devices()
+        except YoueJiaAuthError:
+            errors["base"] = "invalid_auth"
+            discovered = []
+        except YoueJiaApiError:
+            errors["base"] = "cannot_connect"
+            discovered = []
+        # 云端暂时没有返回的已选设备也保留在列表中，以便移除
+        devices = {**current, **{dev[const.DATA_KEY_SN]: dev for dev in discovered}}
+
+        if user_input is not None:
+            selected = set(user_input["selected_devices"])
+            return self.async_create_entry(data={
+                **entry.options,
+                'include_devices': [dev for sn, dev in devices.items() if sn in selected],
+            })
+
+        schema = vol.Schema({
+            vol.Required("selected_devices", default=list(current)): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[
+                        selector.SelectOptionDict(value=sn, label=dev[const.DATA_KEY_NAME])
+                        for sn, dev in devices.items()
+                    ],
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            )
+        })
+        return self.async_show_form(
+            step_id="devices",
+            data_schema=schema,
+            errors=errors,
+            description_placeholders={"count": str(len(devices))},
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """无法连接时抛出的错误。"""
 
@@ -4,4 +4,62 @@ DOMAIN = "youejia"
 
 DATA_KEY_SN='sn'
 DATA_KEY_NAME='nickname'
-DATA_KEY_PASSWD='passwd'
\ No newline at end of file
+DATA_KEY_PASSWD='passwd'
+
+DEVICE_TYPE_HEATER = 29  # user_get_info 中取暖器的设备类型
+
+DATA_HUBS = 'hubs'  # hass.data[DOMAIN][DATA_HUBS]: user_id -> 协调器
+DATA_SESSION = 'session'  # hass.data[DOMAIN][DATA_SESSION]: 共享的 HTTP 会话
+
+# 自适应轮询
+CONF_FAST_INTERVAL = 'fast_interval'
+CONF_SCAN_INTERVAL = 'scan_interval'
+CONF_SLOW_INTERVAL = 'slow_interval'
+
+DEFAULT_FAST_INTERVAL = 5  # 秒，命令后或加热状态变化时
+DEFAULT_SCAN_INTERVAL = 30  # 秒，常规轮询
+DEFAULT_SLOW_INTERVAL = 150  # 秒，所有设备长时间稳定时
+
+FAST_POLL_WINDOW = 60  # 命令/状态变化后保持快速轮询的时长（秒）
+STABLE_WINDOW = 600  # 无任何变化超过该时长视为稳定（秒）
+MAX_BACKOFF_INTERVAL = 600  # 失败退避的上限（秒）
+OFFLINE_POLL_INTERVAL = 600  # 离线设备单独成组，按该间隔（秒）查询是否恢复在线
+
+# 分片并发查询
+CONF_SHARD_SIZE = 'shard_size'
+CONF_MAX_CONCURRENCY = 'max_concurrency'
+
+DEFAULT_SHARD_SIZE = 20  # 每个 user_dev_info 请求最多包含的设备数
+DEFAULT_MAX_CONCURRENCY = 4  # 同时进行的分片请求数
+
+# 设备快照持久化（用于启动时预热）
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # 秒，合并短时间内的多次写入
+
+# 命令队列：防抖窗口内同一设备的多次设置合并为一次 set
+CONF_COMMAND_DEBOUNCE = 'command_debounce'
+DEFAULT_COMMAND_DEBOUNCE = 300  # 毫秒
+
+# 服务
+SERVICE_BULK_SET = 'bulk_set'
+
+# token 有效期：到期前该时长（秒）内提示重新认证
+TOKEN_EXPIRY_WARNING = 7 * 24 * 3600
+
+# 请求追踪（默认关闭）
+CONF_TRACING = 'tracing'
+TRACE_CAPACITY = 20  # 保留最慢的调用次数
+SERVICE_DUMP_TRACE = 'dump_trace'
+TRACE_DIR = 'youejia_traces'  # dump_trace 的输出目录，位于配置目录下
+
+# 候选接入点：按探测延迟选择，失败时切换
+CONF_ENDPOINTS = 'endpoints'
+ENDPOINT_PROBE_INTERVAL = 300  # 秒，有多个候选接入点时重新探测延迟的间隔
+
+# 在选项中增删设备（不重新加载 entry）
+DISCOVERY_CACHE_TTL = 120  # 秒，缓存 user_get_info 的设备列表，避免反复打开选项时重复请求
+SIGNAL_DEVICES_UPDATED = f"{DOMAIN}_devices_updated_{{}}"  # 参数为 entry_id
+
+# 每台设备在内存中保留最近一段时间的轮询样本，用于派生加热占空比、升温速率等传感器
+HISTORY_WINDOW = 1800  # 秒，按时长淘汰，派生指标的窗口不随轮询间隔变化
+HISTORY_SIZE = HISTORY_WINDOW // DEFAULT_FAST_INTERVAL + 1  # 样本数上限，默认的快速轮询间隔下也能覆盖整个窗口
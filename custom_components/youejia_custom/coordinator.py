@@ -1,41 +1,668 @@
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from datetime import timedelta
 import logging
+import random
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr, entity_registry as er, issue_registry as ir
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
-from .api import YoueJiaApiClient
-from .const import DOMAIN, DATA_KEY_SN
+from .api import (
+    CommandQueue,
+    DeviceState,
+    YoueJiaApiClient,
+    YoueJiaApiError,
+    YoueJiaAuthError,
+    YoueJiaCircuitOpenError,
+    YoueJiaDeviceError,
+    validate_set_fields,
+)
+from .api.history import DeviceHistory
+from .api.metrics import LatencyHistogram
+from .api.tracing import CallTrace
+from .const import (
+    CONF_COMMAND_DEBOUNCE,
+    CONF_ENDPOINTS,
+    CONF_FAST_INTERVAL,
+    CONF_MAX_CONCURRENCY,
+    CONF_SCAN_INTERVAL,
+    CONF_SHARD_SIZE,
+    CONF_SLOW_INTERVAL,
+    CONF_TRACING,
+    DATA_KEY_PASSWD,
+    DATA_KEY_SN,
+    DEFAULT_COMMAND_DEBOUNCE,
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SHARD_SIZE,
+    DEFAULT_SLOW_INTERVAL,
+    DEVICE_TYPE_HEATER,
+    DISCOVERY_CACHE_TTL,
+    DOMAIN,
+    ENDPOINT_PROBE_INTERVAL,
+    FAST_POLL_WINDOW,
+    HISTORY_SIZE,
+    HISTORY_WINDOW,
+    MAX_BACKOFF_INTERVAL,
+    OFFLINE_POLL_INTERVAL,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    STABLE_WINDOW,
+    TOKEN_EXPIRY_WARNING,
+    TRACE_CAPACITY,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# 这些字段变化说明设备处于活跃状态，需要加快轮询
+_ACTIVITY_KEYS = ('is_heat', 'k_close', 'temp_status')
+
+POLL_REASON_NORMAL = 'normal'
+POLL_REASON_COMMAND = 'command'
+POLL_REASON_CHANGING = 'changing'
+POLL_REASON_STABLE = 'stable'
+POLL_REASON_BACKOFF = 'backoff'
+POLL_REASON_AUTH_FAILED = 'auth_failed'
+POLL_REASON_IDLE = 'idle'
+
+
+def snapshot_store(hass: HomeAssistant, user_id: str) -> Store[dict[str, dict[str, Any]]]:
+    """账号设备快照的持久化存储。"""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{user_id}")
+
+
+@callback
+def _entity_enabled_may_change(event_data: er.EventEntityRegistryUpdatedData) -> bool:
+    """只关心实体的增删和启用状态变化。"""
+    return event_data["action"] != "update" or "disabled_by" in event_data["changes"]
+
+
 class YouEJiaCoordinator(DataUpdateCoordinator):
-    """用于管理优E家数据的协调器。"""
+    """用于管理优E家数据的协调器。
+
+    每个账号（user_id）只有一个协调器，由该账号下的所有 config entry 共享：
+    各 entry 的 include_devices 合并为一次 user_dev_info 轮询。
+    """
 
-    def __init__(self, hass: HomeAssistant, api_client: YoueJiaApiClient, ce: ConfigEntry) -> None:
+    def __init__(self, hass: HomeAssistant, api_client: YoueJiaApiClient) -> None:
         """初始化协调器。"""
         super().__init__(
             hass,
             _LOGGER,
-            name=DOMAIN,
-            # 这里设置轮询间隔，比如 30 秒
-            update_interval=timedelta(seconds=30),
+            # 协调器的生命周期由引用计数管理，不绑定到单个 config entry
+            config_entry=None,
+            name=f"{DOMAIN}_{api_client.user_id}",
+            update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
         )
         self.api = api_client
-        self.ce = ce
+        self.entries: dict[str, ConfigEntry] = {}
+        # 客户端自身配置的候选接入点，选项中未配置接入点时使用
+        self._default_endpoints = api_client.endpoints.urls
+
+        # 自适应轮询的状态，时间均为 time.monotonic()
+        self.poll_reason = POLL_REASON_NORMAL
+        self._last_command = 0.0
+        # 启动时没有任何变化，不应进入快速轮询窗口
+        self._last_activity = time.monotonic() - FAST_POLL_WINDOW
+        self._failures = 0
+        # token 失效后暂停轮询，直到重新认证
+        self.auth_failed = False
+        # 上一次查询离线设备的时间
+        self._last_offline_poll = 0.0
+        # 上一次探测候选接入点延迟的时间，None 表示尚未探测
+        self._last_endpoint_probe: float | None = None
+        # 缓存的账号设备列表：(获取时间, 取暖器列表)
+        self._discovered: tuple[float, list[dict[str, Any]]] | None = None
+
+        # 最近一次轮询中未能获取到的设备，对应实体显示为不可用
+        self.failed_devices: set[str] = set()
+        # 接口熔断期间、或启动时使用持久化快照时，数据标记为过期
+        self.stale = False
+        self._store = snapshot_store(hass, api_client.user_id)
+
+        # 字段级变更检测：上一次通知监听者时的快照，以及本次各设备变化的字段
+        self._notified_data: dict[str, DeviceState] | None = None
+        self.changed_fields: dict[str, frozenset[str]] = {}
+        # 因所关心字段未变化而跳过的实体状态写入次数
+        self.skipped_writes = 0
+        # 每台设备最近若干次轮询的时间序列
+        self.history: dict[str, DeviceHistory] = {}
+        # 每次轮询（含所有分片）的耗时
+        self.poll_latency = LatencyHistogram()
+        # 开启追踪时，本次轮询的追踪记录，在通知监听者后结束；轮询失败时在刷新结束时结束
+        self._poll_trace: CallTrace | None = None
+        # 按设备合并、串行执行的命令队列
+        self.commands = CommandQueue(self._async_execute_command)
+        # 已提交（含防抖等待中）但 set 尚未结束的命令数，以及各设备最近一次 set 结束的时间
+        self._commands_pending: Counter[str] = Counter()
+        self._command_done: dict[str, float] = {}
+        # 需要轮询的设备，选项或实体注册表变化时失效
+        self._request_serial_numbers: list[str] | None = None
+        self._unsub_entity_registry = hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED,
+            self._async_entity_registry_updated,
+            event_filter=_entity_enabled_may_change,
+        )
+
+    @callback
+    def async_add_entry(self, entry: ConfigEntry) -> None:
+        """登记一个使用本协调器的 config entry。"""
+        self.entries[entry.entry_id] = entry
+        self.async_invalidate_serial_numbers()
+
+    @callback
+    def async_remove_entry(self, entry: ConfigEntry) -> bool:
+        """注销 config entry，返回是否已没有任何 entry 在使用。"""
+        self.entries.pop(entry.entry_id, None)
+        self.async_invalidate_serial_numbers()
+        return not self.entries
+
+    @property
+    def serial_numbers(self) -> list[str]:
+        """所有 entry 选中设备的序列号（去重，保持顺序）。"""
+        return list(dict.fromkeys(
+            dev.get(DATA_KEY_SN)
+            for entry in self.entries.values()
+            for dev in entry.options.get('include_devices') or []
+            if dev
+        ))
+
+    @property
+    def request_serial_numbers(self) -> list[str]:
+        """需要轮询的设备：选中的设备中去掉所有实体都已禁用的。
+
+        结果缓存到选项变化或实体注册表变化为止，轮询时不再重复计算。
+        """
+        if self._request_serial_numbers is None:
+            self._request_serial_numbers = self._enabled_serial_numbers()
+        return self._request_serial_numbers
+
+    def _enabled_serial_numbers(self) -> list[str]:
+        entity_registry = er.async_get(self.hass)
+        device_registry = dr.async_get(self.hass)
+        # sn -> 是否至少有一个启用的实体；还没有注册实体的新设备照常轮询
+        enabled: dict[str, bool] = {}
+        for entry_id in self.entries:
+            for entity in er.async_entries_for_config_entry(entity_registry, entry_id):
+                if entity.device_id is None or (device := device_registry.async_get(entity.device_id)) is None:
+                    continue
+                for domain, sn in device.identifiers:
+                    if domain == DOMAIN:
+                        enabled[sn] = enabled.get(sn, False) or not entity.disabled
+        return [sn for sn in self.serial_numbers if enabled.get(sn, True)]
+
+    @callback
+    def async_invalidate_serial_numbers(self) -> None:
+        """选项或实体注册表变化后重新计算需要轮询的设备；之前已停止轮询的，有设备后恢复。"""
+        self._request_serial_numbers = None
+        if self.poll_reason == POLL_REASON_IDLE and self.request_serial_numbers:
+            self._async_update_interval()
+            self.hass.async_create_background_task(self.async_request_refresh(), f"{self.name} resume polling")
+
+    @callback
+    def _async_entity_registry_updated(self, event: Event[er.EventEntityRegistryUpdatedData]) -> None:
+        self.async_invalidate_serial_numbers()
+
+    async def async_discover_devices(self) -> list[dict[str, Any]]:
+        """账号下的所有取暖器（user_get_info），结果缓存 DISCOVERY_CACHE_TTL 秒。"""
+        now = time.monotonic()
+        if self._discovered is None or now - self._discovered[0] >= DISCOVERY_CACHE_TTL:
+            user_info = await self.api.async_get_user_info()
+            self._discovered = (now, [
+                dev for dev in user_info.get('devices') or [] if dev.get('type') == DEVICE_TYPE_HEATER
+            ])
+        return self._discovered[1]
+
+    def device_password(self, sn: str) -> str | None:
+        """设备的控制密码；设备不属于本协调器时返回 None。"""
+        for entry in self.entries.values():
+            for dev in entry.options.get('include_devices') or []:
+                if dev and dev.get(DATA_KEY_SN) == sn:
+                    return dev.get(DATA_KEY_PASSWD, '')
+        return None
+
+    @property
+    def offline_devices(self) -> set[str]:
+        """快照中云端标记为离线的设备。"""
+        return {sn for sn, dev in (self.data or {}).items() if dev.offline}
+
+    def is_offline(self, sn: str) -> bool:
+        """设备在快照中是否被标记为离线。"""
+        return bool(self.data and sn in self.data and self.data[sn].offline)
+
+    def _poll_serial_numbers(self) -> list[str]:
+        """本次需要查询的设备：离线设备单独成组，只按 OFFLINE_POLL_INTERVAL 查询一次。"""
+        sn_list = self.request_serial_numbers
+        offline = self.offline_devices
+        if not offline:
+            return sn_list
+
+        now = time.monotonic()
+        if now - self._last_offline_poll >= OFFLINE_POLL_INTERVAL:
+            self._last_offline_poll = now
+            return sn_list
+        return [sn for sn in sn_list if sn not in offline]
 
     async def _async_update_data(self):
         """在这里执行那个“批量查询”的 API 调用。"""
-        # _LOGGER.warning("进入更新: _async_update_data", )
+        tracing = any(entry.options.get(CONF_TRACING) for entry in self.entries.values())
+        await self.api.async_set_tracing(TRACE_CAPACITY if tracing else None)
+        self._async_apply_endpoints()
+        tracer = self.api.tracer
+        self._poll_trace = trace = tracer.start("poll") if tracer is not None else None
+
+        sn_list = self._poll_serial_numbers()
+        if not sn_list:
+            # 没有启用任何设备的实体，或所有设备都离线且还没到查询离线设备的时间
+            self._async_update_interval()
+            return self.data if self.data is not None else {}
+
+        start = poll_started = time.monotonic()
         try:
-            data = await self.api.async_get_devices([dev.get(DATA_KEY_SN) for dev in self.ce.options.get('include_devices')])
-            # _LOGGER.warning("YoueJiaCoordinator: update_data: %s", json.json_dumps(data))
-            dev_list = data.get('dev')
-            return {dev[DATA_KEY_SN]: dev for dev in dev_list}
+            dev_list, failed = await self.api.async_get_devices_sharded(
+                sn_list,
+                shard_size=self._option(CONF_SHARD_SIZE, DEFAULT_SHARD_SIZE),
+                max_concurrency=self._option(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+            )
+            request_errors = [err for err in failed.values() if not isinstance(err, YoueJiaDeviceError)]
+            if request_errors and not dev_list:
+                # 所有分片都失败，才认为整体更新失败；单台设备的数据无效只影响该设备
+                raise request_errors[0]
+        except YoueJiaAuthError as err:
+            self._async_auth_failed(err)
+            raise UpdateFailed(f"认证失败，已暂停轮询: {err}") from err
+        except YoueJiaCircuitOpenError as err:
+            self._failures += 1
+            self._async_update_interval()
+            if self.data is None:
+                raise UpdateFailed(f"Error communicating with API: {err}") from err
+            _LOGGER.debug("接口熔断中，继续使用上一次的设备快照: %s", err)
+            self.stale = True
+            return self.data
         except Exception as err:
+            self.poll_latency.record(time.monotonic() - start)
+            self._failures += 1
+            self._async_update_interval()
             # 如果抛出 UpdateFailed，所有关联实体都会变成“不可用”状态
-            raise UpdateFailed(f"Error communicating with API: {err}")
\ No newline at end of file
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        finally:
+            # 失败（例如超时）的轮询往往最慢，同样需要记录
+            if trace is not None:
+                trace.span("fetch", start)
+
+        self.poll_latency.record(time.monotonic() - start)
+        start = time.monotonic()
+        polled = {dev.sn: dev for dev in dev_list}
+        # 轮询开始后有命令完成或仍在执行的设备，快照中已是（或即将是）命令之后的状态，
+        # 本次轮询返回的可能是命令之前的旧状态，不能用它覆盖
+        for sn in polled.keys() & self._commanded_since(poll_started):
+            if self.data and sn in self.data:
+                polled[sn] = self.data[sn]
+        # 本次没有查询的离线设备沿用上一次的数据
+        result: dict[str, DeviceState] = {
+            sn: self.data[sn] for sn in set(self.request_serial_numbers).difference(sn_list)
+            if self.data and sn in self.data
+        }
+        result.update(polled)
+        # 失败分片中的设备保留上一次的数据，但标记为不可用
+        self.failed_devices = {sn for sn in sn_list if sn not in polled}
+        if self.failed_devices:
+            _LOGGER.debug("以下设备本次未能更新: %s", self.failed_devices)
+            for sn in self.failed_devices:
+                if self.data and sn in self.data:
+                    result[sn] = self.data[sn]
+
+        self._record_history(polled)
+        self._failures = 0
+        self.stale = False
+        self._async_check_token_expiry()
+        if self._has_activity(self.data, result):
+            self._last_activity = time.monotonic()
+        self._async_update_interval()
+        if trace is not None:
+            trace.span("build", start)
+        return result
+
+    @callback
+    def _async_apply_endpoints(self) -> None:
+        """应用各 entry 配置的候选接入点（取并集），有多个时定期在后台探测延迟。
+
+        所有 entry 都未配置时使用客户端创建时的接入点（base_url 或 endpoints 参数）。
+        """
+        endpoints = [
+            url for entry in self.entries.values() for url in entry.options.get(CONF_ENDPOINTS) or []
+        ]
+        self.api.endpoints.update(endpoints or self._default_endpoints)
+        if len(self.api.endpoints.urls) < 2:
+            return
+
+        now = time.monotonic()
+        if self._last_endpoint_probe is None or now - self._last_endpoint_probe >= ENDPOINT_PROBE_INTERVAL:
+            self._last_endpoint_probe = now
+            self.hass.async_create_background_task(
+                self.api.async_probe_endpoints(), f"{self.name} endpoint probe"
+            )
+
+    def _record_history(self, polled: dict[str, DeviceState]) -> None:
+        """把本次轮询到的在线设备写入各自的时间序列，并丢弃已移除或禁用的设备的序列。"""
+        now = time.monotonic()
+        for sn, dev in polled.items():
+            if dev.offline:
+                continue
+            if (history := self.history.get(sn)) is None:
+                history = self.history[sn] = DeviceHistory(HISTORY_SIZE, HISTORY_WINDOW)
+            history.append(now, dev.temp, dev.temp_floor, dev.is_heat, dev.temp_status)
+        for sn in self.history.keys() - set(self.request_serial_numbers):
+            del self.history[sn]
+
+    def _commanded_since(self, started: float) -> set[str]:
+        """在 started 之后完成 set，或已提交命令但 set 尚未结束的设备。"""
+        return set(self._commands_pending) | {sn for sn, done in self._command_done.items() if done >= started}
+
+    @contextmanager
+    def _command_pending(self, serial_numbers: Iterable[str]) -> Iterator[None]:
+        """从提交命令到 set 结束，把设备标记为有待生效的命令（可嵌套）。"""
+        serial_numbers = list(serial_numbers)
+        self._commands_pending.update(serial_numbers)
+        try:
+            yield
+        finally:
+            # 减法会去掉计数归零的设备
+            self._commands_pending -= Counter(serial_numbers)
+            self._command_done.update(dict.fromkeys(serial_numbers, time.monotonic()))
+
+    @staticmethod
+    def _has_activity(old: dict[str, DeviceState] | None, new: dict[str, DeviceState]) -> bool:
+        """判断两次快照之间是否有设备的活跃字段发生变化。"""
+        if not old:
+            return False
+        for sn, dev in new.items():
+            prev = old.get(sn)
+            if prev is None or any(getattr(prev, key) != getattr(dev, key) for key in _ACTIVITY_KEYS):
+                return True
+        return False
+
+    def _option(self, key: str, default: int) -> int:
+        """读取选项；多个 entry 的设置不同时取最小值。"""
+        return min((int(entry.options.get(key, default)) for entry in self.entries.values()), default=default)
+
+    @callback
+    def _async_update_interval(self) -> None:
+        """根据最近的命令、设备变化和失败次数计算下一次轮询间隔。"""
+        if self.auth_failed:
+            # 用无效的 token 轮询只会不断失败
+            self.poll_reason = POLL_REASON_AUTH_FAILED
+            self.update_interval = None
+            return
+        if not self.request_serial_numbers:
+            # 没有启用任何设备的实体时停止轮询，重新启用后恢复
+            self.poll_reason = POLL_REASON_IDLE
+            self.update_interval = None
+            return
+
+        scan_interval = self._option(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        now = time.monotonic()
+
+        if self._failures:
+            # 指数退避 + 抖动，避免云端故障时持续打满请求
+            delay = min(scan_interval * 2 ** (self._failures - 1), MAX_BACKOFF_INTERVAL)
+            seconds, reason = random.uniform(delay / 2, delay), POLL_REASON_BACKOFF
+        elif now - self._last_command < FAST_POLL_WINDOW:
+            seconds, reason = self._option(CONF_FAST_INTERVAL, DEFAULT_FAST_INTERVAL), POLL_REASON_COMMAND
+        elif now - self._last_activity < FAST_POLL_WINDOW:
+            seconds, reason = self._option(CONF_FAST_INTERVAL, DEFAULT_FAST_INTERVAL), POLL_REASON_CHANGING
+        elif now - self._last_activity >= STABLE_WINDOW:
+            seconds, reason = self._option(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL), POLL_REASON_STABLE
+        else:
+            seconds, reason = scan_interval, POLL_REASON_NORMAL
+
+        if reason != self.poll_reason:
+            _LOGGER.debug("轮询间隔调整为 %.1f 秒，原因: %s", seconds, reason)
+        self.poll_reason = reason
+        self.update_interval = timedelta(seconds=seconds)
+
+    @property
+    def _token_issue_id(self) -> str:
+        return f"token_expiring_{self.api.user_id}"
+
+    @callback
+    def _async_check_token_expiry(self) -> None:
+        """token 即将过期时创建修复提示，并发起重新认证。"""
+        expires_at = self.api.token_expires_at
+        if expires_at is None or expires_at - time.time() > TOKEN_EXPIRY_WARNING:
+            ir.async_delete_issue(self.hass, DOMAIN, self._token_issue_id)
+            return
+        if ir.async_get(self.hass).async_get_issue(DOMAIN, self._token_issue_id) is not None:
+            return
+
+        _LOGGER.warning("账号 %s 的 token 即将过期", self.api.user_id)
+        ir.async_create_issue(
+            self.hass,
+            DOMAIN,
+            self._token_issue_id,
+            is_fixable=False,
+            severity=ir.IssueSeverity.WARNING,
+            translation_key="token_expiring",
+            translation_placeholders={
+                "user_id": self.api.user_id,
+                "expires": dt_util.as_local(dt_util.utc_from_timestamp(expires_at)).strftime("%Y-%m-%d %H:%M"),
+            },
+        )
+        self._async_start_reauth()
+
+    @callback
+    def _async_auth_failed(self, err: YoueJiaAuthError) -> None:
+        """token 失效：暂停轮询并发起重新认证，不再重试。"""
+        if self.auth_failed:
+            return
+        _LOGGER.warning("账号 %s 认证失败，暂停轮询直到重新认证: %s", self.api.user_id, err)
+        self.auth_failed = True
+        self._async_update_interval()
+        self._async_start_reauth()
+
+    @callback
+    def _async_start_reauth(self) -> None:
+        # 同一账号的 entry 共用 token，重新认证流程会一并更新，只需对其中一个发起
+        if entry := next(iter(self.entries.values()), None):
+            entry.async_start_reauth(self.hass)
+
+    @callback
+    def async_update_token(self, token: str) -> None:
+        """重新认证后更换 token，恢复轮询。"""
+        self.api.update_token(token)
+        ir.async_delete_issue(self.hass, DOMAIN, self._token_issue_id)
+        if not self.auth_failed:
+            return
+        self.auth_failed = False
+        self._async_update_interval()
+        self.hass.async_create_background_task(self.async_refresh(), f"{DOMAIN} refresh after reauth")
+
+    async def async_load_snapshot(self) -> bool:
+        """加载上一次持久化的快照作为初始数据（标记为过期），返回是否加载成功。"""
+        try:
+            stored = await self._store.async_load()
+            if not stored:
+                return False
+            data = {sn: DeviceState.from_payload(payload) for sn, payload in stored.items()}
+        except (YoueJiaApiError, AttributeError, TypeError, ValueError) as err:
+            _LOGGER.warning("设备快照无效，忽略: %s", err)
+            return False
+
+        self.data = data
+        self.stale = True
+        return True
+
+    @callback
+    def _snapshot(self) -> dict[str, dict[str, Any]]:
+        """需要持久化的快照：各设备的原始 payload。"""
+        return {sn: state.as_payload() for sn, state in (self.data or {}).items()}
+
+    @callback
+    def _async_refresh_finished(self) -> None:
+        """轮询失败时结束追踪：连续失败时 Home Assistant 不会再通知监听者。"""
+        if self.last_update_success or (trace := self._poll_trace) is None:
+            return
+        self._poll_trace = None
+        if self.api.tracer is not None:
+            self.api.tracer.finish(trace)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """通知监听者之前，先找出与上一次通知相比各设备变化了哪些字段。"""
+        self.changed_fields = self._diff(self._notified_data, self.data)
+        self._notified_data = self.data
+        if self.changed_fields and not self.stale:
+            # 只在数据变化时持久化，并合并短时间内的多次写入
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+        if (trace := self._poll_trace) is None or self.api.tracer is None:
+            super().async_update_listeners()
+            return
+        # 记录实体状态写入（fan-out）的耗时，并结束本次轮询的追踪
+        self._poll_trace = None
+        with trace.measure("notify"):
+            super().async_update_listeners()
+        self.api.tracer.finish(trace)
+
+    @staticmethod
+    def _diff(
+            old: dict[str, DeviceState] | None, new: dict[str, DeviceState] | None
+    ) -> dict[str, frozenset[str]]:
+        changed: dict[str, frozenset[str]] = {}
+        old = old or {}
+        for sn, dev in (new or {}).items():
+            prev = old.get(sn)
+            if prev is dev:
+                continue
+            if prev is None:
+                changed[sn] = frozenset(DeviceState.FIELDS)
+                continue
+            keys = frozenset(key for key in DeviceState.FIELDS if getattr(prev, key) != getattr(dev, key))
+            if keys:
+                changed[sn] = keys
+        return changed
+
+    def has_changes(self, sn: str, fields: frozenset[str]) -> bool:
+        """本次通知中，设备 sn 的这些字段是否发生了变化。"""
+        changed = self.changed_fields.get(sn)
+        return changed is not None and not changed.isdisjoint(fields)
+
+    async def async_send_command(self, sn: str, password: str, fields: dict[str, Any]) -> None:
+        """通过命令队列设置设备字段（可同时设置 SET_SCHEMA 中的多个字段）。
+
+        防抖窗口内同一设备的多次设置按字段合并（后写覆盖先写）为一次 set；
+        同一设备的 set 串行执行，避免乱序返回的旧状态覆盖新状态。
+        """
+        if self.is_offline(sn):
+            # 离线设备的 set 只会等到超时，直接失败
+            raise HomeAssistantError(f"设备 {sn} 当前离线")
+
+        self.commands.debounce = self._option(CONF_COMMAND_DEBOUNCE, DEFAULT_COMMAND_DEBOUNCE) / 1000
+        try:
+            # 提交前先校验，避免一个非法字段拖累同一批合并的其他命令
+            fields = validate_set_fields(fields)
+            # 防抖等待期间快照中可能已是乐观更新的状态，轮询返回的旧状态同样不能覆盖它
+            with self._command_pending([sn]):
+                await self.commands.async_submit(sn, password, fields)
+        except YoueJiaAuthError as err:
+            self._async_auth_failed(err)
+            raise HomeAssistantError(f"设备 {sn} 指令执行失败，需要重新认证: {err}") from err
+        except YoueJiaApiError as err:
+            raise HomeAssistantError(f"设备 {sn} 指令执行失败: {err}") from err
+
+    async def _async_execute_command(self, sn: str, password: str, fields: dict[str, Any]) -> None:
+        """发出一次合并后的 set，并把返回的完整设备状态写回快照。
+
+        set 接口本身就返回该设备的全部字段，因此命令之后无需再轮询整个账号。
+        """
+        # 提交命令的调用方可能已被取消，set 发出期间仍需标记
+        with self._command_pending([sn]):
+            state = await self.api.async_set_state(sn, password, **fields)
+
+        # 命令之后短时间内加快轮询，尽快拿到设备的后续变化
+        self._last_command = time.monotonic()
+        self._async_update_interval()
+        self.async_apply_device_state(sn, state)
+
+    async def async_bulk_set(self, commands: dict[str, dict[str, Any]]) -> dict[str, YoueJiaApiError | None]:
+        """把多台设备的 set 打包成一个 JSON-RPC 批量请求发出，所有返回的状态只合并进快照一次。
+
+        经过命令队列，与逐台的命令按设备串行；服务端不支持批量请求时由客户端退回为单个请求。
+        返回每台设备的结果：成功为 None，失败为对应的异常。
+        """
+        results: dict[str, YoueJiaApiError | None] = {}
+        for sn in [sn for sn in commands if self.is_offline(sn)]:
+            results[sn] = YoueJiaApiError(f"设备 {sn} 当前离线")
+        batch = {
+            sn: (self.device_password(sn) or '', fields) for sn, fields in commands.items() if sn not in results
+        }
+        if batch:
+            with self._command_pending(batch):
+                results.update(await self.commands.async_submit_batch(batch, self._async_execute_batch))
+        return results
+
+    async def _async_execute_batch(
+            self, commands: dict[str, tuple[str, dict[str, Any]]]
+    ) -> dict[str, YoueJiaApiError | None]:
+        """发出一批 set，并把返回的状态一次性写回快照。"""
+        calls = [self.api.set_call(sn, password, fields) for sn, (password, fields) in commands.items()]
+        try:
+            with self._command_pending(commands):
+                replies = await self.api.async_call_batch(calls)
+        except YoueJiaApiError as err:
+            # 熔断、token 过期等在发出前就失败，所有设备都视为失败
+            replies = [err] * len(calls)
+
+        results: dict[str, YoueJiaApiError | None] = {}
+        data = dict(self.data or {})
+        for sn, reply in zip(commands, replies):
+            if isinstance(reply, YoueJiaAuthError):
+                self._async_auth_failed(reply)
+            if isinstance(reply, YoueJiaApiError):
+                results[sn] = reply
+                continue
+            try:
+                data[sn] = data[sn].merge(reply) if sn in data else DeviceState.from_payload({DATA_KEY_SN: sn, **reply})
+            except YoueJiaApiError as err:
+                results[sn] = err
+            else:
+                results[sn] = None
+
+        if any(err is None for err in results.values()):
+            self._last_command = time.monotonic()
+            self._async_update_interval()
+            self.async_set_updated_data(data)
+        return results
+
+    async def async_shutdown(self) -> None:
+        """停止轮询，并取消尚未发出的命令。"""
+        self._unsub_entity_registry()
+        await super().async_shutdown()
+        await self.commands.async_close()
+
+    @callback
+    def async_apply_device_state(self, sn: str, state: dict[str, Any]) -> None:
+        """将单个设备的（部分）状态合并进快照，并通知所有监听者。"""
+        if not isinstance(state, dict):
+            raise HomeAssistantError(f"设备 {sn} 返回的状态无效: {state}")
+
+        # 复制一份新的快照，避免原地修改影响其他监听者；
+        # set 的返回值不含 sn/nickname/offline 等字段，需要与旧值合并
+        data = dict(self.data or {})
+        try:
+            data[sn] = data[sn].merge(state) if sn in data else DeviceState.from_payload({DATA_KEY_SN: sn, **state})
+        except YoueJiaApiError as err:
+            raise HomeAssistantError(f"设备 {sn} 返回的状态无效: {err}") from err
+        self.async_set_updated_data(data)
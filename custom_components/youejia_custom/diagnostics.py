@@ -0,0 +1,48 @@
+"""youejia 的诊断信息。"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_TOKEN
+from homeassistant.core import HomeAssistant
+
+from . import YouEJiaConfigEntry
+from .const import DATA_KEY_PASSWD
+
+TO_REDACT = {CONF_TOKEN, DATA_KEY_PASSWD, 'p_w', 'user_id'}
+
+
+async def async_get_config_entry_diagnostics(
+        hass: HomeAssistant, entry: YouEJiaConfigEntry
+) -> dict[str, Any]:
+    """返回 config entry 的诊断信息（token、密码已脱敏）。"""
+    coordinator = entry.runtime_data
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "poll_reason": coordinator.poll_reason,
+            "serial_numbers": coordinator.serial_numbers,
+            "request_serial_numbers": coordinator.request_serial_numbers,
+            "offline_devices": sorted(coordinator.offline_devices),
+            "failed_devices": sorted(coordinator.failed_devices),
+            "stale": coordinator.stale,
+            "circuit_breaker": coordinator.api.breaker.state,
+            "rate_limiter_queued": coordinator.api.limiter.queued,
+            "skipped_writes": coordinator.skipped_writes,
+            "history_samples": {sn: len(history) for sn, history in coordinator.history.items()},
+            "coalesced_commands": coordinator.commands.coalesced,
+            "poll_latency": coordinator.poll_latency.as_dict(),
+        },
+        "api": coordinator.api.metrics.as_dict(),
+        "connections": coordinator.api.connections.as_dict() if coordinator.api.connections else None,
+        "endpoints": coordinator.api.endpoints.as_dict(),
+        "devices": {
+            sn: async_redact_data(state.as_payload(), TO_REDACT)
+            for sn, state in (coordinator.data or {}).items()
+        },
+    }
@@ -0,0 +1,100 @@
+"""youejia 设备实体的基类。"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .api import DeviceState
+from .const import DATA_KEY_SN, DOMAIN, SIGNAL_DEVICES_UPDATED
+from .coordinator import YouEJiaCoordinator
+
+
+@callback
+def async_add_device_entities(
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        add_entities: AddEntitiesCallback,
+        entities_fn: Callable[[dict[str, Any]], Iterable[Entity]],
+) -> None:
+    """为 entry 选中的每台设备创建实体；之后选项中新增设备时，只为新设备创建实体。
+
+    移除的设备由 entry 的选项更新监听从设备注册表中解除关联，其实体随之删除。
+    """
+    known: set[str] = set()
+
+    @callback
+    def _async_add_new() -> None:
+        nonlocal known
+        devices = {dev[DATA_KEY_SN]: dev for dev in entry.options.get('include_devices') or [] if dev}
+        if new := [entity for sn, dev in devices.items() if sn not in known for entity in entities_fn(dev)]:
+            add_entities(new)
+        known = set(devices)
+
+    _async_add_new()
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_DEVICES_UPDATED.format(entry.entry_id), _async_add_new)
+    )
+
+
+class YouEJiaDeviceEntity(CoordinatorEntity[YouEJiaCoordinator]):
+    """单台设备的实体，状态全部来自协调器的快照，不产生额外请求。
+
+    每个实体只订阅自己渲染的字段（_projected_fields），其他字段变化时不写入状态。
+    """
+
+    # 本实体状态依赖的设备字段，只有这些字段变化时才写入状态
+    _projected_fields: frozenset[str] = frozenset()
+
+    def __init__(self, coordinator: YouEJiaCoordinator, sn: str, device_name: str | None = None) -> None:
+        super().__init__(coordinator)
+        self._sn = sn
+        self._last_status: tuple[bool, bool] | None = None  # 上一次写入状态时的 (可用性, 是否过期)
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, sn)},
+            name=device_name,
+            manufacturer="优E家",
+            serial_number=sn,
+        )
+
+    @property
+    def sn(self):
+        return self._sn
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """仅当可用性、过期标记或本实体关心的字段变化时才写入状态。"""
+        status = (self.available, self.coordinator.stale)
+        if status == self._last_status and not self.coordinator.has_changes(self.sn, self._projected_fields):
+            self.coordinator.skipped_writes += 1
+            return
+
+        self._last_status = status
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """协调器可用、本设备在最近一次轮询中成功更新且云端未标记为离线。"""
+        return (
+            super().available
+            and self.sn in self.coordinator.data
+            and self.sn not in self.coordinator.failed_devices
+            and not self.coordinator.data[self.sn].offline
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        # 接口熔断期间显示的是上一次成功轮询的数据
+        return {"stale": self.coordinator.stale}
+
+    @property
+    def device_state(self) -> DeviceState:
+        return self.coordinator.data[self.sn]
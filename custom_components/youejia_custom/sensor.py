@@ -0,0 +1,326 @@
+"""youejia 的设备传感器、由设备时间序列派生的传感器，以及账号级的诊断传感器（默认禁用）。"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    PERCENTAGE,
+    SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    EntityCategory,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import YouEJiaConfigEntry, YouEJiaCoordinator, account_sensors_owner
+from .api import DeviceState
+from .api.history import DeviceHistory
+from .const import DATA_KEY_NAME, DATA_KEY_SN
+from .entity import YouEJiaDeviceEntity, async_add_device_entities
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _wait_p95(coordinator: YouEJiaCoordinator, priority: str) -> float | None:
+    """某一优先级的请求在限流器中排队时间的 P95（毫秒）。"""
+    wait = coordinator.api.metrics.limiter_wait.get(priority)
+    return _ms(wait.percentile(0.95)) if wait is not None else None
+
+
+def _reuse_percent(coordinator: YouEJiaCoordinator) -> float | None:
+    """会话复用已有连接的请求占比（%）。"""
+    connections = coordinator.api.connections
+    if connections is None or (ratio := connections.reuse_ratio) is None:
+        return None
+    return round(ratio * 100, 1)
+
+
+@dataclass(frozen=True, kw_only=True)
+class YouEJiaDiagnosticSensorDescription(SensorEntityDescription):
+    """描述一个基于协调器统计值的诊断传感器。"""
+
+    value_fn: Callable[[YouEJiaCoordinator], Any]
+
+
+DIAGNOSTIC_SENSORS: tuple[YouEJiaDiagnosticSensorDescription, ...] = (
+    YouEJiaDiagnosticSensorDescription(
+        key="poll_interval",
+        name="轮询间隔",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        value_fn=lambda cd: cd.update_interval.total_seconds() if cd.update_interval else None,
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="poll_reason",
+        name="轮询间隔原因",
+        value_fn=lambda cd: cd.poll_reason,
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="poll_duration",
+        name="轮询耗时",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda cd: _ms(cd.poll_latency.last),
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="poll_duration_p95",
+        name="轮询耗时 P95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda cd: _ms(cd.poll_latency.percentile(0.95)),
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="api_requests",
+        name="接口请求数",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda cd: cd.api.metrics.total_requests,
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="api_errors",
+        name="接口错误数",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda cd: cd.api.metrics.total_errors,
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="command_wait_p95",
+        name="命令限流等待 P95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda cd: _wait_p95(cd, "command"),
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="poll_wait_p95",
+        name="轮询限流等待 P95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda cd: _wait_p95(cd, "poll"),
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="connection_reuse",
+        name="连接复用率",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda cd: _reuse_percent(cd),
+    ),
+    YouEJiaDiagnosticSensorDescription(
+        key="skipped_writes",
+        name="跳过的状态写入",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda cd: cd.skipped_writes,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class YouEJiaSensorDescription(SensorEntityDescription):
+    """描述一个基于设备快照字段的传感器。"""
+
+    field: str  # 依赖的 DeviceState 字段
+    value_fn: Callable[[DeviceState], Any]
+
+
+def _temperature(key: str, name: str) -> YouEJiaSensorDescription:
+    return YouEJiaSensorDescription(
+        key=key,
+        name=name,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        field=key,
+        value_fn=lambda state: getattr(state, key),
+    )
+
+
+def _price(key: str, name: str, index: int | None = None) -> YouEJiaSensorDescription:
+    return YouEJiaSensorDescription(
+        key=key,
+        name=name,
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement="CNY",
+        field='E_price' if index is None else 'E_FGP',
+        value_fn=(lambda state: state.E_price) if index is None else (
+            lambda state: state.E_FGP[index] if state.E_FGP and len(state.E_FGP) > index else None),
+    )
+
+
+DEVICE_SENSORS: tuple[YouEJiaSensorDescription, ...] = (
+    _temperature("temp_floor", "地面温度"),
+    _temperature("temp_max", "最高温度"),
+    _temperature("temp_min", "最低温度"),
+    _temperature("temp_avg", "平均温度"),
+    YouEJiaSensorDescription(
+        key="rssi",
+        name="信号强度",
+        device_class=SensorDeviceClass.SIGNAL_STRENGTH,
+        native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        field="rssi",
+        value_fn=lambda state: state.rssi,
+    ),
+    _price("E_price", "电费"),
+    _price("E_FGP_peak", "峰时电费", 0),
+    _price("E_FGP_valley", "谷时电费", 1),
+    _price("E_FGP_flat", "平时电费", 2),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class YouEJiaHistorySensorDescription(SensorEntityDescription):
+    """描述一个由设备时间序列派生的传感器。"""
+
+    value_fn: Callable[[DeviceHistory], Any]
+
+
+def _round(value: float | None, digits: int, scale: float = 1) -> float | None:
+    return round(value * scale, digits) if value is not None else None
+
+
+HISTORY_SENSORS: tuple[YouEJiaHistorySensorDescription, ...] = (
+    YouEJiaHistorySensorDescription(
+        key="duty_cycle",
+        name="加热占空比",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda history: _round(history.duty_cycle, 1, scale=100),
+    ),
+    YouEJiaHistorySensorDescription(
+        key="heating_rate",
+        name="升温速率",
+        native_unit_of_measurement=f"{UnitOfTemperature.CELSIUS}/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda history: _round(history.temperature_rate, 2),
+    ),
+    YouEJiaHistorySensorDescription(
+        key="time_to_target",
+        name="预计到达目标温度",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        value_fn=lambda history: _round(history.time_to_target, 0, scale=1 / 60),
+    ),
+)
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        config: YouEJiaConfigEntry,
+        add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the sensor platform."""
+    user_id = config.data['api_data']['user_id']
+    if account_sensors_owner(hass, user_id) == config.entry_id:
+        add_entities([
+            YouEJiaDiagnosticSensor(config.runtime_data, user_id, description)
+            for description in DIAGNOSTIC_SENSORS
+        ])
+    async_add_device_entities(hass, config, add_entities, lambda dev: [
+        *(
+            YouEJiaDeviceSensor(config.runtime_data, dev[DATA_KEY_SN], dev[DATA_KEY_NAME], description)
+            for description in DEVICE_SENSORS
+        ),
+        *(
+            YouEJiaHistorySensor(config.runtime_data, dev[DATA_KEY_SN], dev[DATA_KEY_NAME], description)
+            for description in HISTORY_SENSORS
+        ),
+    ])
+
+
+class YouEJiaDeviceSensor(YouEJiaDeviceEntity, SensorEntity):
+    """设备快照中某一字段的传感器，只订阅该字段。"""
+
+    entity_description: YouEJiaSensorDescription
+    _attr_has_entity_name = True
+
+    def __init__(
+            self,
+            coordinator: YouEJiaCoordinator,
+            sn: str,
+            device_name: str,
+            description: YouEJiaSensorDescription,
+    ) -> None:
+        super().__init__(coordinator, sn, device_name)
+        self.entity_description = description
+        self._attr_unique_id = f"{sn}_{description.key}"
+        self._projected_fields = frozenset({description.field})
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.device_state)
+
+
+class YouEJiaHistorySensor(YouEJiaDeviceEntity, SensorEntity):
+    """由协调器保存的设备时间序列派生的传感器，无需查询 recorder。"""
+
+    entity_description: YouEJiaHistorySensorDescription
+    _attr_has_entity_name = True
+
+    def __init__(
+            self,
+            coordinator: YouEJiaCoordinator,
+            sn: str,
+            device_name: str,
+            description: YouEJiaHistorySensorDescription,
+    ) -> None:
+        super().__init__(coordinator, sn, device_name)
+        self.entity_description = description
+        self._attr_unique_id = f"{sn}_{description.key}"
+        self._last_written: tuple[Any, ...] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """每次轮询都会写入时间序列，只有派生值或可用性变化时才写入状态。"""
+        written = (self.available, self.coordinator.stale, self.native_value)
+        if written == self._last_written:
+            self.coordinator.skipped_writes += 1
+            return
+
+        self._last_written = written
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> Any:
+        if (history := self.coordinator.history.get(self.sn)) is None:
+            return None
+        return self.entity_description.value_fn(history)
+
+
+class YouEJiaDiagnosticSensor(CoordinatorEntity[YouEJiaCoordinator], SensorEntity):
+    """账号级别的诊断传感器，每个账号只有一组。"""
+
+    entity_description: YouEJiaDiagnosticSensorDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+            self,
+            coordinator: YouEJiaCoordinator,
+            user_id: str,
+            description: YouEJiaDiagnosticSensorDescription,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{user_id}_{description.key}"
+
+    @property
+    def available(self) -> bool:
+        # 统计值在云端不可用时同样有意义
+        return True
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.coordinator)
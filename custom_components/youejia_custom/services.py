@@ -0,0 +1,156 @@
+"""youejia 集成的服务。"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.climate import ATTR_HVAC_MODE, HVACMode
+from homeassistant.const import ATTR_TEMPERATURE
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.json import save_json
+from homeassistant.util import dt as dt_util
+
+from .api import YoueJiaApiError, YoueJiaMode, validate_set_fields
+from .const import (
+    DATA_HUBS,
+    DATA_KEY_SN,
+    DOMAIN,
+    SERVICE_BULK_SET,
+    SERVICE_DUMP_TRACE,
+    TRACE_DIR,
+)
+from .coordinator import YouEJiaCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_DEVICES = 'devices'
+ATTR_SERIAL_NUMBERS = 'serial_numbers'
+ATTR_MODE = 'mode'
+ATTR_FILENAME = 'filename'
+
+# 目标状态：都可省略，但每台设备最终至少要有一个字段
+_TARGET_STATE = {
+    vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+    vol.Optional(ATTR_HVAC_MODE): vol.In([HVACMode.HEAT, HVACMode.OFF]),
+    vol.Optional(ATTR_MODE): vol.In([mode.name.lower() for mode in YoueJiaMode]),
+}
+
+BULK_SET_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional(ATTR_SERIAL_NUMBERS): vol.All(cv.ensure_list, [cv.string]),
+        # 按设备单独指定的目标状态，覆盖顶层的公共目标状态
+        vol.Optional(ATTR_DEVICES): [vol.Schema({vol.Required(DATA_KEY_SN): cv.string, **_TARGET_STATE})],
+        **_TARGET_STATE,
+    }),
+    cv.has_at_least_one_key(ATTR_SERIAL_NUMBERS, ATTR_DEVICES),
+)
+
+
+
+def _filename(value: Any) -> str:
+    """只允许不含路径的文件名，输出位置固定在 TRACE_DIR 下。"""
+    value = cv.string(value).strip()
+    if value in ('', '.') or '..' in value or any(char in value for char in '/\\\0'):
+        raise vol.Invalid(f"文件名不能包含路径: {value}")
+    return value
+
+
+DUMP_TRACE_SCHEMA = vol.Schema({vol.Optional(ATTR_FILENAME): _filename})
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """注册 youejia 的服务。"""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        _async_bulk_set,
+        schema=BULK_SET_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TRACE,
+        _async_dump_trace,
+        schema=DUMP_TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _fields(target: dict[str, Any]) -> dict[str, Any]:
+    """把服务参数中的目标状态转换为 set 字段。"""
+    fields: dict[str, Any] = {}
+    if ATTR_HVAC_MODE in target:
+        fields['k_close'] = target[ATTR_HVAC_MODE] != HVACMode.HEAT
+    if ATTR_TEMPERATURE in target:
+        fields['hw_temp_set'] = int(target[ATTR_TEMPERATURE])
+    if ATTR_MODE in target:
+        fields['mode'] = YoueJiaMode[target[ATTR_MODE].upper()]
+    return fields
+
+
+async def _async_bulk_set(call: ServiceCall) -> ServiceResponse:
+    """设置多台设备：每个账号发出一个批量请求、只合并一次状态，并返回每台设备的结果。"""
+    shared = _fields(call.data)
+    commands: dict[str, dict[str, Any]] = {sn: dict(shared) for sn in call.data.get(ATTR_SERIAL_NUMBERS, [])}
+    for device in call.data.get(ATTR_DEVICES, []):
+        commands[device[DATA_KEY_SN]] = {**commands.get(device[DATA_KEY_SN], shared), **_fields(device)}
+
+    hubs: dict[str, YouEJiaCoordinator] = call.hass.data.get(DOMAIN, {}).get(DATA_HUBS, {})
+    errors: dict[str, Exception] = {}
+    by_hub: dict[YouEJiaCoordinator, dict[str, dict[str, Any]]] = {}
+    for sn, fields in commands.items():
+        cd = next((hub for hub in hubs.values() if hub.device_password(sn) is not None), None)
+        if cd is None:
+            errors[sn] = HomeAssistantError(f"未找到设备 {sn}")
+            continue
+        try:
+            by_hub.setdefault(cd, {})[sn] = validate_set_fields(fields)
+        except YoueJiaApiError as err:
+            errors[sn] = err
+
+    # 不同账号之间也并发执行
+    hub_results = await asyncio.gather(*(
+        cd.async_bulk_set(hub_commands)
+        for cd, hub_commands in by_hub.items()
+    ))
+    for results in hub_results:
+        errors.update({sn: err for sn, err in results.items() if err is not None})
+
+    if errors:
+        _LOGGER.warning("批量设置部分失败: %s", {sn: str(err) for sn, err in errors.items()})
+        if not call.return_response:
+            raise HomeAssistantError(f"以下设备设置失败: {', '.join(errors)}")
+
+    return {
+        "results": {
+            sn: {"success": False, "error": str(errors[sn])} if sn in errors else {"success": True}
+            for sn in commands
+        }
+    }
+
+
+async def _async_dump_trace(call: ServiceCall) -> ServiceResponse:
+    """把各账号追踪到的最慢调用写入配置目录下 TRACE_DIR 中的 JSON 文件。"""
+    hass = call.hass
+    hubs: dict[str, YouEJiaCoordinator] = hass.data.get(DOMAIN, {}).get(DATA_HUBS, {})
+    traces = {cd.name: cd.api.tracer.as_dict() for cd in hubs.values() if cd.api.tracer is not None}
+    if not traces:
+        raise HomeAssistantError("未开启请求追踪，请先在集成选项中开启")
+
+    filename = call.data.get(ATTR_FILENAME) or f"youejia_trace_{dt_util.now():%Y%m%d_%H%M%S}.json"
+    path = hass.config.path(TRACE_DIR, filename)
+    await hass.async_add_executor_job(_save_traces, path, traces)
+    _LOGGER.info("请求追踪已写入 %s", path)
+    return {"path": path}
+
+
+def _save_traces(path: str, traces: dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    save_json(path, traces)
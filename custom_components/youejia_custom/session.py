@@ -0,0 +1,57 @@
+"""youejia 集成共享的 HTTP 会话。"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .api import ConnectionStats, create_session, http_trace_config
+from .const import DATA_SESSION, DOMAIN
+
+
+@dataclass(slots=True)
+class SharedSession:
+    """所有账号、配置流程共用的会话，以及它的连接复用统计。
+
+    session 只挂连接复用统计；traced 额外挂 http_trace_config，只在有账号开启追踪时创建，
+    未开启追踪的请求不经过各阶段的计时信号。
+    """
+
+    session: aiohttp.ClientSession
+    connections: ConnectionStats
+    traced: aiohttp.ClientSession | None = None
+
+    def traced_session(self) -> aiohttp.ClientSession:
+        """获取（必要时创建）开启追踪时使用的会话，与 session 共用连接复用统计。"""
+        if self.traced is None or self.traced.closed:
+            self.traced = create_session([self.connections.trace_config(), http_trace_config()])
+        return self.traced
+
+
+@callback
+def async_get_shared_session(hass: HomeAssistant) -> SharedSession:
+    """获取（必要时创建）共享会话，Home Assistant 关闭时自动关闭。
+
+    所有 entry 和 validate_input 复用同一个连接池，对 cn.zncn.net.cn 的 DNS 解析、
+    TCP 和 TLS 握手只需进行一次。
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    shared: SharedSession | None = domain_data.get(DATA_SESSION)
+    if shared is not None and not shared.session.closed:
+        return shared
+
+    connections = ConnectionStats()
+    shared = domain_data[DATA_SESSION] = SharedSession(
+        create_session([connections.trace_config()]), connections)
+
+    async def _async_close(event: Event) -> None:
+        await shared.session.close()
+        if shared.traced is not None:
+            await shared.traced.close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return shared
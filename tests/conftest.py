@@ -0,0 +1,65 @@
+"""测试共用的夹具：带实体/设备注册表的最小 Home Assistant 实例和本地假 /ubus 服务器。"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+import sys
+from types import MappingProxyType
+from typing import Any
+
+import pytest
+import pytest_asyncio
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from fake_ubus import FakeUbus, FakeUbusConfig  # noqa: E402
+
+from homeassistant.config_entries import SOURCE_USER, ConfigEntries, ConfigEntry  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import device_registry as dr, entity_registry as er  # noqa: E402
+
+from custom_components.youejia_custom.const import DOMAIN  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path: Path) -> AsyncIterator[HomeAssistant]:
+    hass = HomeAssistant(str(tmp_path))
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest_asyncio.fixture
+async def fake() -> AsyncIterator[FakeUbus]:
+    server = FakeUbus(FakeUbusConfig(devices=3, latency=0.0, jitter=0.0))
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+def add_entry(hass: HomeAssistant, fake: FakeUbus) -> Callable[..., ConfigEntry]:
+    """登记一个选中假服务器所有设备的 config entry（不触发集成的 setup），关键字参数为额外的选项。"""
+
+    def _add(*, user_id: str = "test-user", **options: Any) -> ConfigEntry:
+        entry = ConfigEntry(
+            data={"api_data": {"user_id": user_id}},
+            discovery_keys=MappingProxyType({}),
+            domain=DOMAIN,
+            minor_version=1,
+            options={"include_devices": fake.include_devices(), **options},
+            source=SOURCE_USER,
+            subentries_data=None,
+            title=user_id,
+            unique_id=None,
+            version=1,
+        )
+        hass.config_entries._entries[entry.entry_id] = entry  # noqa: SLF001
+        return entry
+
+    return _add
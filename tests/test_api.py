@@ -0,0 +1,82 @@
+"""API 客户端的熔断与统计。"""
+
+from __future__ import annotations
+
+import asyncio
+
+from fake_ubus import FakeUbus
+import pytest
+
+from custom_components.youejia_custom.api import YoueJiaApiClient
+from custom_components.youejia_custom.api.resilience import CircuitBreaker
+
+
+def _half_open(client: YoueJiaApiClient) -> None:
+    """让熔断器进入冷却结束、等待试探请求的状态。"""
+    for _ in range(client.breaker.failure_threshold):
+        client.breaker.record_failure()
+    client.breaker.opened_at -= client.breaker.reset_timeout
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batch_releases_half_open_probe(fake: FakeUbus) -> None:
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url)
+    try:
+        _half_open(client)
+        fake.config.latency = 1.0
+        calls = [client.set_call(sn, fake.passwd, {"hw_temp_set": 20}) for sn in fake.serial_numbers]
+        task = asyncio.ensure_future(client.async_call_batch(calls))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # 被取消的批量请求不应一直占着试探名额
+        fake.config.latency = 0.0
+        await client.async_get_user_info()
+        assert client.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        await client.async_close()
+
+
+@pytest.mark.asyncio
+async def test_hedge_loser_is_not_recorded(fake: FakeUbus) -> None:
+    # 限流器有排队时不会对冲，放宽限流
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url, rate_limit=1000, rate_burst=1000)
+    await client.async_set_tracing(10)
+    try:
+        # 积累足够的延迟样本，之后的慢请求才会触发对冲
+        while client._read_latency.percentile(0.95) is None:  # noqa: SLF001
+            await client.async_get_devices(fake.serial_numbers)
+        stats = client.metrics.methods["user_dev_info"]
+        successes, samples, traced = stats.outcomes["success"], stats.latency.count, client.tracer.recorded
+
+        fake.config.latency = 1.0
+        task = asyncio.ensure_future(client.async_get_devices(fake.serial_numbers))
+        await asyncio.sleep(0.1)
+        # 对冲请求很快返回，第一个请求被取消
+        fake.config.latency = 0.0
+        await task
+
+        assert client.metrics.hedged_requests == 1
+        assert stats.outcomes["success"] == successes + 1
+        assert stats.latency.count == samples + 1
+        assert client.tracer.recorded == traced + 1
+    finally:
+        await client.async_close()
+
+
+@pytest.mark.asyncio
+async def test_sharded_poll_in_half_open_state_probes_first(fake: FakeUbus) -> None:
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url)
+    try:
+        _half_open(client)
+        devices, failed = await client.async_get_devices_sharded(
+            fake.serial_numbers, shard_size=1, max_concurrency=len(fake.serial_numbers))
+
+        # 只有一个分片能作为试探请求；试探成功后其余分片不应被熔断拒绝
+        assert not failed
+        assert [dev.sn for dev in devices] == fake.serial_numbers
+        assert client.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        await client.async_close()
@@ -0,0 +1,121 @@
+"""协调器的轮询与命令。"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from fake_ubus import FakeUbus
+import pytest
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.youejia_custom.api import YoueJiaApiClient
+from custom_components.youejia_custom.const import CONF_TRACING, DOMAIN
+from custom_components.youejia_custom.coordinator import YouEJiaCoordinator
+
+
+def _register_entity(
+        hass: HomeAssistant, entry: ConfigEntry, sn: str, *, disabled: bool,
+) -> er.RegistryEntry:
+    device = dr.async_get(hass).async_get_or_create(config_entry_id=entry.entry_id, identifiers={(DOMAIN, sn)})
+    return er.async_get(hass).async_get_or_create(
+        "climate", DOMAIN, sn,
+        config_entry=entry,
+        device_id=device.id,
+        disabled_by=er.RegistryEntryDisabler.USER if disabled else None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_device_with_all_entities_disabled_is_not_polled(
+        hass: HomeAssistant, fake: FakeUbus, add_entry: Callable[..., ConfigEntry],
+) -> None:
+    entry = add_entry()
+    disabled_sn, enabled_sn, new_sn = fake.serial_numbers
+    entity = _register_entity(hass, entry, disabled_sn, disabled=True)
+    _register_entity(hass, entry, enabled_sn, disabled=False)
+
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url)
+    coordinator = YouEJiaCoordinator(hass, client)
+    coordinator.async_add_entry(entry)
+    try:
+        # 还没有注册实体的设备照常轮询
+        assert coordinator.request_serial_numbers == [enabled_sn, new_sn]
+
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert disabled_sn not in fake.device_reads
+        assert fake.device_reads == {enabled_sn: 1, new_sn: 1}
+        assert set(coordinator.data) == {enabled_sn, new_sn}
+
+        # 重新启用实体后，下一次轮询恢复查询该设备
+        er.async_get(hass).async_update_entity(entity.entity_id, disabled_by=None)
+        await hass.async_block_till_done()
+        assert coordinator.request_serial_numbers == fake.serial_numbers
+
+        await coordinator.async_refresh()
+        assert fake.device_reads[disabled_sn] == 1
+        assert disabled_sn in coordinator.data
+    finally:
+        await coordinator.async_shutdown()
+        await client.async_close()
+
+
+@pytest.mark.asyncio
+async def test_poll_during_command_debounce_keeps_optimistic_state(
+        hass: HomeAssistant, fake: FakeUbus, add_entry: Callable[..., ConfigEntry],
+) -> None:
+    entry = add_entry()
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url)
+    coordinator = YouEJiaCoordinator(hass, client)
+    coordinator.async_add_entry(entry)
+    try:
+        await coordinator.async_refresh()
+        sn = fake.serial_numbers[0]
+        target = int(coordinator.data[sn].temp_status) + 5
+        seen: list[float] = []
+        remove = coordinator.async_add_listener(lambda: seen.append(coordinator.data[sn].temp_status))
+
+        # 与 ElectricHeater._async_set_state 相同：先乐观更新，再提交命令
+        coordinator.async_apply_device_state(sn, {"temp_status": target})
+        command = asyncio.ensure_future(coordinator.async_send_command(sn, fake.passwd, {"hw_temp_set": target}))
+        await asyncio.sleep(0)
+        # 这次轮询在防抖窗口内完成，返回的是命令之前的状态
+        await coordinator.async_refresh()
+        assert "set" not in fake.calls
+        await command
+        remove()
+
+        assert fake.calls["set"] == 1
+        assert set(seen) == {target}
+        assert coordinator.data[sn].temp_status == target
+    finally:
+        await coordinator.async_shutdown()
+        await client.async_close()
+
+
+@pytest.mark.asyncio
+async def test_failed_polls_are_traced(
+        hass: HomeAssistant, fake: FakeUbus, add_entry: Callable[..., ConfigEntry],
+) -> None:
+    entry = add_entry(**{CONF_TRACING: True})
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url)
+    coordinator = YouEJiaCoordinator(hass, client)
+    coordinator.async_add_entry(entry)
+    try:
+        fake.config.status = 404
+        # 连续失败时 Home Assistant 不会通知监听者，追踪仍需结束
+        for _ in range(2):
+            await coordinator.async_refresh()
+            assert not coordinator.last_update_success
+
+        polls = [trace for trace in client.tracer.as_dict()["slowest"] if trace["name"] == "poll"]
+        assert len(polls) == 2
+        for trace in polls:
+            assert [span["name"] for span in trace["spans"]] == ["fetch"]
+    finally:
+        await coordinator.async_shutdown()
+        await client.async_close()
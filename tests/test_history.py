@@ -0,0 +1,34 @@
+"""设备时间序列按时长淘汰样本。"""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.youejia_custom.api.history import DeviceHistory
+from custom_components.youejia_custom.const import DEFAULT_FAST_INTERVAL, DEFAULT_SLOW_INTERVAL, HISTORY_SIZE, HISTORY_WINDOW
+
+
+def _fill(history: DeviceHistory, interval: float, duration: float) -> None:
+    """按固定间隔写入样本：每 600 秒加热 300 秒，温度每小时升高 2 °C。"""
+    timestamp = 0.0
+    while timestamp <= duration:
+        history.append(timestamp, 18 + timestamp / 1800, None, timestamp % 600 < 300, 25)
+        timestamp += interval
+
+
+@pytest.mark.parametrize("interval", [DEFAULT_FAST_INTERVAL, 30, DEFAULT_SLOW_INTERVAL])
+def test_window_does_not_depend_on_poll_interval(interval: float) -> None:
+    history = DeviceHistory(HISTORY_SIZE, HISTORY_WINDOW)
+    _fill(history, interval, 4 * 3600)
+
+    assert HISTORY_WINDOW - interval < history.span <= HISTORY_WINDOW
+    assert history.duty_cycle == pytest.approx(0.5, abs=interval / 600)
+    assert history.temperature_rate == pytest.approx(2.0, abs=0.1)
+
+
+def test_capacity_still_bounds_the_window() -> None:
+    history = DeviceHistory(10, HISTORY_WINDOW)
+    _fill(history, 5, 3600)
+
+    assert len(history) == 10
+    assert history.span == 45
@@ -0,0 +1,56 @@
+"""账号级诊断传感器的创建。"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from fake_ubus import FakeUbus
+import pytest
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+
+from custom_components.youejia_custom import async_remove_entry
+from custom_components.youejia_custom.api import YoueJiaApiClient
+from custom_components.youejia_custom.coordinator import YouEJiaCoordinator
+from custom_components.youejia_custom.sensor import (
+    DIAGNOSTIC_SENSORS,
+    YouEJiaDiagnosticSensor,
+    async_setup_entry,
+)
+
+
+@pytest.mark.asyncio
+async def test_diagnostic_sensors_are_created_once_per_account(
+        hass: HomeAssistant, fake: FakeUbus, add_entry: Callable[..., ConfigEntry], monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = YoueJiaApiClient("test-token", "test-user", base_url=fake.base_url)
+    coordinator = YouEJiaCoordinator(hass, client)
+    entries = sorted((add_entry(), add_entry()), key=lambda entry: entry.entry_id)
+    try:
+        created: dict[str, list[Entity]] = {}
+        for entry in entries:
+            coordinator.async_add_entry(entry)
+            entry.runtime_data = coordinator
+            created[entry.entry_id] = []
+            await async_setup_entry(hass, entry, created[entry.entry_id].extend)
+
+        # 同一账号的 entry 共用一个协调器，诊断传感器只由 entry_id 最小的一个创建
+        diagnostics = {
+            entry_id: [entity.unique_id for entity in entities if isinstance(entity, YouEJiaDiagnosticSensor)]
+            for entry_id, entities in created.items()
+        }
+        owner, other = entries
+        assert diagnostics[owner.entry_id] == [f"test-user_{description.key}" for description in DIAGNOSTIC_SENSORS]
+        assert diagnostics[other.entry_id] == []
+
+        # 删除持有诊断传感器的 entry 后，由剩下的 entry 重新加载接手
+        reloaded: list[str] = []
+        monkeypatch.setattr(hass.config_entries, "async_schedule_reload", reloaded.append)
+        del hass.config_entries._entries[owner.entry_id]  # noqa: SLF001
+        await async_remove_entry(hass, owner)
+        assert reloaded == [other.entry_id]
+    finally:
+        await coordinator.async_shutdown()
+        await client.async_close()